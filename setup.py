@@ -4,7 +4,14 @@ setup(
     name="tetris",
     version="0.1",
     packages=find_packages(),
-    entry_points={"console_scripts": ["tetris = tetris.__main__:main"]},
+    extras_require={"batch": ["numpy"]},
+    entry_points={
+        "console_scripts": [
+            "tetris = tetris.__main__:main",
+            "tetris-tournament = tetris.tournament:main",
+            "tetris-server = tetris.server:main",
+        ]
+    },
     description="A Tetris clone",
     url="https://github.com/yourusername/tetris",
     classifiers=[
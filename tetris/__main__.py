@@ -1,40 +1,156 @@
+import argparse
 import curses
+import getpass
 import time
 
+from tetris.config import Config
+from tetris.gui.profiler_overlay import ProfilerOverlay
+from tetris.gui.renderer import Renderer
+from tetris.input import InputQueue
+from tetris.profiler import profiler
+from tetris.replay import ReplayRecorder, append_replay, read_replays
 from tetris.scenes.main_scene import MainScene
+from tetris.scores import ScoreStore
+from tetris.utils import board_size, game_seed
 
 
 class Game:
+    def __init__(
+        self,
+        tick_rate=Config.TICK_RATE,
+        show_profiler=False,
+        profile_output=None,
+        seed=None,
+        record_path=None,
+        replay=None,
+        player=None,
+        score_store=None,
+        rows=Config.ROWS,
+        cols=Config.COLS,
+        practice=False,
+    ):
+        self.tick_rate = replay.tick_rate if replay is not None else tick_rate
+        self.seed = seed
+        self.record_path = record_path
+        self.replay = replay
+        self.player = player
+        self.score_store = score_store
+        self.rows = rows
+        self.cols = cols
+        self.practice = practice
+        self.profiler_overlay = ProfilerOverlay(profiler, visible=show_profiler)
+        self.profile_output = profile_output
+        profiler.enabled = show_profiler or profile_output is not None
+
     def init(self):
         self.init_curses()
 
-        self.last_time = time.time()
-        self.main_scene = MainScene(self.stdscr)
+        self.main_scene = None
+        self.renderer = Renderer(self.stdscr)
+        self.input = InputQueue(self.stdscr)
+        self.set_scene(
+            MainScene(
+                self.stdscr,
+                self.input,
+                tick_rate=self.tick_rate,
+                seed=self.seed,
+                recorder=self.create_recorder(),
+                replay=self.replay,
+                player=self.player,
+                score_store=self.score_store,
+                rows=self.rows,
+                cols=self.cols,
+                practice=self.practice,
+            )
+        )
+
+    def create_recorder(self):
+        if self.record_path is None:
+            return None
+
+        return ReplayRecorder(
+            on_finish=lambda replay: append_replay(self.record_path, replay),
+            defer_finish=self.practice,
+        )
+
+    def set_scene(self, scene):
+        if self.main_scene is not None:
+            self.main_scene.exit()
+
+        self.main_scene = scene
         self.main_scene.init()
+        self.renderer.invalidate()
 
     def run(self):
+        dt = 1 / self.tick_rate
+        next_update = time.perf_counter()
+        skipped_frames = 0
+
         while True:
-            self.update()
-            self.draw()
+            delay = next_update - time.perf_counter()
 
-            time.sleep(1 / 60.0)
+            # Keys that arrive before the deadline move the piece and are drawn
+            # right away, but ticks and gravity stay on the fixed timestep
+            if delay > 0 and self.input.wait(delay):
+                self.handle_input()
 
-    def draw(self):
-        self.clear_screen()
-        self.main_scene.draw()
-        self.stdscr.refresh()
+            updates = 0
+
+            while (
+                time.perf_counter() >= next_update
+                and updates < Config.MAX_UPDATES_PER_FRAME
+            ):
+                self.update(dt)
+                next_update += dt
+                updates += 1
+
+            if updates == Config.MAX_UPDATES_PER_FRAME:
+                next_update = time.perf_counter() + dt
+
+            is_behind = time.perf_counter() >= next_update
+
+            if is_behind and skipped_frames < Config.MAX_SKIPPED_FRAMES:
+                skipped_frames += 1
+                continue
 
-    def update(self):
-        dt = self.delta_time()
+            skipped_frames = 0
+            self.draw()
 
+    @profiler.phase("game.draw")
+    def draw(self):
+        self.renderer.begin_frame()
+        self.main_scene.draw(self.renderer)
+        self.profiler_overlay.draw(self.renderer)
+        self.renderer.present()
+
+    def handle_input(self):
+        self.handle_keys()
+        self.main_scene.handle_input()
+
+    @profiler.phase("game.update")
+    def update(self, dt):
+        self.input.drain()
+        self.handle_keys()
         self.main_scene.update(dt)
 
-    def delta_time(self):
-        current_time = time.time()
-        dt = current_time - self.last_time
-        self.last_time = current_time
+    def handle_keys(self):
+        resized = False
+
+        # curses turns SIGWINCH into KEY_RESIZE, the only time the terminal
+        # size has to be read again
+        while self.input.consume(curses.KEY_RESIZE):
+            resized = True
+
+        if resized:
+            self.resize(*self.stdscr.getmaxyx())
 
-        return dt
+        if self.input.consume(ord(Config.PROFILER_KEY)):
+            self.profiler_overlay.toggle()
+            profiler.enabled = profiler.enabled or self.profiler_overlay.visible
+
+    def resize(self, rows, cols):
+        self.renderer.resize(rows, cols)
+        self.main_scene.resize(rows, cols)
 
     def init_curses(self):
         self.stdscr = curses.initscr()
@@ -51,19 +167,82 @@ class Game:
         curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_BLACK)
         curses.init_color(0, 0, 0, 0)
 
-    def clear_screen(self):
-        self.stdscr.erase()
-        self.stdscr.bkgd(" ", curses.color_pair(2))
+        self.stdscr.bkgd(" ", curses.color_pair(Config.COLOR_BLACK))
 
     def exit(self):
+        self.main_scene.exit()
+        self.input.close()
+
+        if self.profile_output is not None:
+            profiler.dump(self.profile_output)
         self.stdscr.keypad(False)
         curses.nocbreak()
         curses.echo()
         curses.endwin()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(prog="tetris", description="A Tetris clone")
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=Config.TICK_RATE,
+        help="simulation and target frame rate",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"show frame timings (toggle with '{Config.PROFILER_KEY}')",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="write frame timing percentiles as JSON on exit",
+    )
+    parser.add_argument("--seed", type=game_seed, help="seed for the first game")
+    parser.add_argument("--rows", type=board_size, default=Config.ROWS)
+    parser.add_argument("--cols", type=board_size, default=Config.COLS)
+    parser.add_argument(
+        "--practice",
+        action="store_true",
+        help=f"rewind the game with '{Config.REWIND_KEY}', scores are not saved",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="append the inputs of every finished game to a replay file",
+    )
+    parser.add_argument(
+        "--replay", metavar="FILE", help="play back the first game of a replay file"
+    )
+
+    parser.add_argument(
+        "--player",
+        default=getpass.getuser(),
+        help="name saved with your scores, defaults to the login name",
+    )
+    parser.add_argument(
+        "--scores", metavar="FILE", help="keep the leaderboard in this file"
+    )
+
+    return parser.parse_args()
+
+
 def main():
-    game = Game()
+    args = parse_args()
+    game = Game(
+        tick_rate=args.fps,
+        show_profiler=args.profile,
+        profile_output=args.profile_output,
+        seed=args.seed,
+        record_path=args.record,
+        replay=read_replays(args.replay)[0] if args.replay else None,
+        player=args.player,
+        score_store=ScoreStore(args.scores) if args.scores else None,
+        rows=args.rows,
+        cols=args.cols,
+        practice=args.practice,
+    )
 
     try:
         game.init()
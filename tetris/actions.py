@@ -0,0 +1,24 @@
+from enum import Enum, auto
+
+
+class Action(Enum):
+    MOVE_LEFT = auto()
+    MOVE_RIGHT = auto()
+    ROTATE_CLOCKWISE = auto()
+    ROTATE_ANTICLOCKWISE = auto()
+    SOFT_DROP = auto()
+    HARD_DROP = auto()
+
+
+KEY_ACTIONS = {
+    ord("h"): Action.MOVE_LEFT,
+    ord("l"): Action.MOVE_RIGHT,
+    ord("i"): Action.ROTATE_CLOCKWISE,
+    ord("z"): Action.ROTATE_ANTICLOCKWISE,
+    ord("j"): Action.SOFT_DROP,
+    ord("k"): Action.HARD_DROP,
+}
+
+
+def actions_from_keys(keys) -> list[Action]:
+    return [KEY_ACTIONS[key] for key in keys if key in KEY_ACTIONS]
@@ -0,0 +1,47 @@
+from collections import deque
+from typing import Optional
+
+from tetris.actions import Action
+from tetris.ai.search import PlacementSearch
+from tetris.simulation import Simulation
+
+
+class Bot:
+    plan: deque[Action]
+
+    def __init__(
+        self,
+        weights: Optional[dict[str, float]] = None,
+        lookahead: bool = True,
+    ):
+        self.weights = weights
+        self.lookahead = lookahead
+        self.search = None
+        self.plan = deque()
+        self.pieces_placed = None
+
+    def __call__(self, simulation: Simulation) -> tuple[Action, ...]:
+        controller = simulation.game_controller
+
+        if controller.pieces_placed != self.pieces_placed:
+            self.pieces_placed = controller.pieces_placed
+            self.plan = deque(self.plan_move(simulation))
+
+        if self.plan:
+            return (self.plan.popleft(),)
+
+        return (Action.SOFT_DROP,)
+
+    def plan_move(self, simulation: Simulation) -> list[Action]:
+        if self.search is None:
+            self.search = PlacementSearch(
+                simulation.grid.rows, simulation.grid.cols, self.weights
+            )
+
+        placement = self.search.best_move(
+            simulation.grid,
+            simulation.piece,
+            simulation.game_controller.next_piece_type if self.lookahead else None,
+        )
+
+        return placement.actions if placement is not None else []
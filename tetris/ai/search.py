@@ -0,0 +1,454 @@
+from typing import Callable, Optional
+
+from tetris.actions import Action
+from tetris.cache import MISSING, LRUCache
+from tetris.config import Config
+from tetris.entities.bitboard_grid import BitboardGrid, shift_mask
+from tetris.entities.grid import Grid
+from tetris.entities.pieces import (
+    PIECE_ROTATIONS,
+    POSSIBLE_PIECE_TYPES,
+    Piece,
+    PieceType,
+    spawn_col,
+)
+from tetris.entities.zobrist import mask_hash, masks_hash, zobrist_keys
+
+GAME_OVER_PENALTY = -1e9
+
+
+class BoardFeatures:
+    masks: tuple[int, ...]
+    heights: list[int]
+    lines_cleared: int
+    holes: int
+    aggregate_height: int
+    bumpiness: int
+    max_height: int
+
+    def __init__(self, masks: tuple[int, ...], cols: int, lines_cleared: int):
+        rows = len(masks)
+        heights = [0] * cols
+        holes = 0
+        covered = 0
+
+        for row_index, mask in enumerate(masks):
+            if not covered and not mask:
+                continue
+
+            holes += bin(covered & ~mask).count("1")
+            new_columns = mask & ~covered
+
+            while new_columns:
+                bit = new_columns & -new_columns
+                heights[bit.bit_length() - 1] = rows - row_index
+                new_columns ^= bit
+
+            covered |= mask
+
+        self.masks = masks
+        self.heights = heights
+        self.lines_cleared = lines_cleared
+        self.holes = holes
+        self.aggregate_height = sum(heights)
+        self.bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        self.max_height = max(heights)
+
+
+Heuristic = Callable[[BoardFeatures], float]
+
+HEURISTICS: dict[str, Heuristic] = {
+    "aggregate_height": lambda features: features.aggregate_height,
+    "lines_cleared": lambda features: features.lines_cleared,
+    "holes": lambda features: features.holes,
+    "bumpiness": lambda features: features.bumpiness,
+    "max_height": lambda features: features.max_height,
+}
+
+DEFAULT_WEIGHTS = {
+    "aggregate_height": -0.510066,
+    "lines_cleared": 0.760666,
+    "holes": -0.35663,
+    "bumpiness": -0.184483,
+}
+
+
+class Placement:
+    piece_type: PieceType
+    rotation: int
+    rotation_steps: int
+    col: int
+    row: int
+    masks: tuple[int, ...]
+    lines_cleared: int
+    hash: int
+    value: float
+    actions: list[Action]
+
+    def __init__(
+        self,
+        piece_type: PieceType,
+        rotation: int,
+        rotation_steps: int,
+        col: int,
+        row: int,
+        masks: tuple[int, ...],
+        lines_cleared: int,
+        board_hash: int,
+    ):
+        self.piece_type = piece_type
+        self.rotation = rotation
+        self.rotation_steps = rotation_steps
+        self.col = col
+        self.row = row
+        self.masks = masks
+        self.lines_cleared = lines_cleared
+        self.hash = board_hash
+        self.value = 0.0
+        self.actions = []
+
+    def move_actions(self, start_col: int) -> list[Action]:
+        if self.rotation_steps >= 0:
+            actions = [Action.ROTATE_CLOCKWISE] * self.rotation_steps
+        else:
+            actions = [Action.ROTATE_ANTICLOCKWISE] * -self.rotation_steps
+
+        if self.col >= start_col:
+            actions += [Action.MOVE_RIGHT] * (self.col - start_col)
+        else:
+            actions += [Action.MOVE_LEFT] * (start_col - self.col)
+
+        return actions + [Action.HARD_DROP]
+
+
+def piece_position(grid: Grid, piece: Piece) -> tuple[int, int]:
+    return (piece.x - grid.x - 2) // 2, piece.y - grid.y
+
+
+def board_masks(grid: Grid) -> tuple[int, ...]:
+    if isinstance(grid, BitboardGrid):
+        return tuple(grid.row_masks)
+
+    return tuple(
+        sum(1 << col for col, cell in enumerate(row) if not cell.is_empty)
+        for row in grid.grid
+    )
+
+
+class PlacementSearch:
+    # Works on immutable tuples of row bitmasks. A placement is reachable when
+    # the piece can rotate in place, then slide sideways along its current row
+    # and finally fall straight down, which is what a bot can do through the
+    # controller's actions. Boards are identified by their Zobrist hash, which
+    # matches Grid.hash. Only landing lists are cached: a move starts from a
+    # board the previous move's lookahead already expanded with this piece.
+    # The boards that get evaluated are rarely seen twice, so caching their
+    # values costs more in lookups than it saves.
+    def __init__(
+        self,
+        rows: int,
+        cols: int,
+        weights: Optional[dict[str, float]] = None,
+        heuristics: Optional[dict[str, Heuristic]] = None,
+        cache_size: int = Config.SEARCH_CACHE_SIZE,
+        lookahead_width: Optional[int] = Config.SEARCH_LOOKAHEAD_WIDTH,
+    ):
+        self.rows = rows
+        self.lookahead_width = lookahead_width
+        self.cols = cols
+        self.full_row_mask = (1 << cols) - 1
+        self.zobrist_keys = zobrist_keys(rows, cols)
+        self.landing_cache = LRUCache(cache_size)
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.heuristics = HEURISTICS if heuristics is None else heuristics
+        self.piece_cells = {
+            piece_type: [
+                self.build_piece_cells(rotation)
+                for rotation in PIECE_ROTATIONS[piece_type]
+            ]
+            for piece_type in POSSIBLE_PIECE_TYPES
+        }
+
+    def build_piece_cells(self, rotation) -> dict[int, tuple[tuple[int, int], ...]]:
+        cells = {}
+
+        for col in range(-rotation.width(), self.cols):
+            shifted = []
+
+            for row_index, mask in rotation.filled_row_masks:
+                if col < 0 and mask & ((1 << -col) - 1):
+                    break
+
+                mask = shift_mask(mask, col)
+
+                if mask > self.full_row_mask:
+                    break
+
+                shifted.append((row_index, mask))
+            else:
+                cells[col] = tuple(shifted)
+
+        return cells
+
+    def fits(self, masks, cells, row) -> bool:
+        for row_index, mask in cells:
+            y = row + row_index
+
+            if y < 0 or y >= self.rows or masks[y] & mask:
+                return False
+
+        return True
+
+    def top_row(self, masks) -> int:
+        top = 0
+
+        while top < self.rows and not masks[top]:
+            top += 1
+
+        return top
+
+    def drop(self, masks, cells, row, top) -> int:
+        row = max(row, top - cells[-1][0] - 1)
+
+        while self.fits(masks, cells, row + 1):
+            row += 1
+
+        return row
+
+    def place(
+        self, masks, board_hash, cells, row
+    ) -> tuple[tuple[int, ...], int, int]:
+        board, lines_cleared = self.place_board(masks, cells, row)
+
+        if lines_cleared:
+            return board, lines_cleared, masks_hash(board, self.zobrist_keys)
+
+        for row_index, mask in cells:
+            board_hash ^= mask_hash(mask, self.zobrist_keys[row + row_index])
+
+        return board, 0, board_hash
+
+    def place_board(self, masks, cells, row) -> tuple[tuple[int, ...], int]:
+        # Boards never hold full rows, so only the rows the piece landed on
+        # can have become full
+        board = list(masks)
+        lines_cleared = 0
+
+        for row_index, mask in cells:
+            board[row + row_index] |= mask
+
+            if board[row + row_index] == self.full_row_mask:
+                lines_cleared += 1
+
+        if not lines_cleared:
+            return tuple(board), 0
+
+        remaining = [mask for mask in board if mask != self.full_row_mask]
+
+        return (0,) * lines_cleared + tuple(remaining), lines_cleared
+
+    def reachable_rotations(self, masks, piece_type, rotation, col, row):
+        rotation_cells = self.piece_cells[piece_type]
+        count = len(rotation_cells)
+        reachable = {rotation: 0}
+
+        for direction in (1, -1):
+            current = rotation
+
+            for step in range(1, count):
+                current = (current + direction) % count
+                cells = rotation_cells[current].get(col)
+
+                if cells is None or not self.fits(masks, cells, row):
+                    break
+
+                if current not in reachable or step < abs(reachable[current]):
+                    reachable[current] = step * direction
+
+        return reachable
+
+    def landings(self, masks, board_hash, piece_type, rotation, col, row):
+        key = (board_hash, piece_type, rotation, col, row)
+        landings = self.landing_cache.get(key)
+
+        if landings is MISSING:
+            landings = tuple(
+                self.find_landings(masks, piece_type, rotation, col, row)
+            )
+            self.landing_cache.put(key, landings)
+
+        return landings
+
+    def find_landings(self, masks, piece_type, rotation, col, row):
+        rotation_cells = self.piece_cells[piece_type]
+        start_cells = rotation_cells[rotation].get(col)
+
+        if start_cells is None or not self.fits(masks, start_cells, row):
+            return
+
+        top = self.top_row(masks)
+        reachable = self.reachable_rotations(masks, piece_type, rotation, col, row)
+
+        for target_rotation, rotation_steps in reachable.items():
+            cells_by_col = rotation_cells[target_rotation]
+
+            for direction in (-1, 1):
+                target_col = col if direction == -1 else col + 1
+
+                while True:
+                    cells = cells_by_col.get(target_col)
+
+                    if cells is None or not self.fits(masks, cells, row):
+                        break
+
+                    landing_row = self.drop(masks, cells, row, top)
+                    yield (
+                        target_rotation,
+                        rotation_steps,
+                        target_col,
+                        landing_row,
+                        cells,
+                    )
+                    target_col += direction
+
+    def placements(
+        self,
+        masks: tuple[int, ...],
+        piece_type: PieceType,
+        rotation: int = 0,
+        col: Optional[int] = None,
+        row: int = 0,
+        board_hash: Optional[int] = None,
+    ) -> list[Placement]:
+        if col is None:
+            col = spawn_col(piece_type, self.cols)
+
+        if board_hash is None:
+            board_hash = masks_hash(masks, self.zobrist_keys)
+
+        placements = {}
+
+        for target_rotation, rotation_steps, target_col, landing_row, cells in (
+            self.landings(masks, board_hash, piece_type, rotation, col, row)
+        ):
+            board, lines_cleared, next_hash = self.place(
+                masks, board_hash, cells, landing_row
+            )
+            placement = placements.get(board)
+
+            if placement is None or abs(rotation_steps) < abs(
+                placement.rotation_steps
+            ):
+                placements[board] = Placement(
+                    piece_type,
+                    target_rotation,
+                    rotation_steps,
+                    target_col,
+                    landing_row,
+                    board,
+                    lines_cleared,
+                    next_hash,
+                )
+
+        return list(placements.values())
+
+    def evaluate(self, masks: tuple[int, ...], lines_cleared: int) -> float:
+        features = BoardFeatures(masks, self.cols, lines_cleared)
+
+        return sum(
+            weight * self.heuristics[name](features)
+            for name, weight in self.weights.items()
+        )
+
+    def best_value(
+        self,
+        masks: tuple[int, ...],
+        board_hash: int,
+        piece_type: PieceType,
+        lines_cleared: int,
+    ) -> float:
+        best = GAME_OVER_PENALTY
+        seen = set()
+        col = spawn_col(piece_type, self.cols)
+
+        for _, _, _, landing_row, cells in self.landings(
+            masks, board_hash, piece_type, 0, col, 0
+        ):
+            # The boards of the second piece are only evaluated, so they are
+            # told apart by their rows rather than by a hash
+            board, next_lines_cleared = self.place_board(masks, cells, landing_row)
+
+            if board in seen:
+                continue
+
+            seen.add(board)
+            best = max(best, self.evaluate(board, lines_cleared + next_lines_cleared))
+
+        return best
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        return {"landings": self.landing_cache.stats()}
+
+    def best_placement(
+        self,
+        masks: tuple[int, ...],
+        piece_type: PieceType,
+        rotation: int = 0,
+        col: Optional[int] = None,
+        row: int = 0,
+        next_piece_type: Optional[PieceType] = None,
+        board_hash: Optional[int] = None,
+    ) -> Optional[Placement]:
+        best = None
+        placements = self.placements(
+            masks, piece_type, rotation, col, row, board_hash
+        )
+
+        if next_piece_type is None or self.lookahead_width is not None:
+            for placement in placements:
+                placement.value = self.evaluate(
+                    placement.masks, placement.lines_cleared
+                )
+
+        if next_piece_type is not None:
+            if self.lookahead_width is not None:
+                # Only the placements that look best on their own are searched
+                # with the next piece, which keeps a move within a frame
+                placements.sort(key=lambda placement: placement.value, reverse=True)
+                del placements[self.lookahead_width :]
+
+            for placement in placements:
+                placement.value = self.best_value(
+                    placement.masks,
+                    placement.hash,
+                    next_piece_type,
+                    placement.lines_cleared,
+                )
+
+        for placement in placements:
+            if best is None or placement.value > best.value:
+                best = placement
+
+        return best
+
+    def best_move(
+        self,
+        grid: Grid,
+        piece: Piece,
+        next_piece_type: Optional[PieceType] = None,
+    ) -> Optional[Placement]:
+        col, row = piece_position(grid, piece)
+        placement = self.best_placement(
+            board_masks(grid),
+            piece.piece_type,
+            piece.rotation,
+            col,
+            row,
+            next_piece_type,
+            grid.hash,
+        )
+
+        if placement is not None:
+            placement.actions = placement.move_actions(col)
+
+        return placement
@@ -0,0 +1,174 @@
+from typing import Optional
+
+import numpy as np
+
+from tetris.config import Config
+from tetris.entities.pieces import PIECE_ROTATIONS, POSSIBLE_PIECE_TYPES, spawn_col
+from tetris.utils import calculate_score
+
+ROTATION_STATES = 4
+CELLS_PER_PIECE = 4
+
+LINE_SCORES = np.array(
+    [0] + [calculate_score(lines) for lines in range(1, CELLS_PER_PIECE + 1)],
+    dtype=np.int64,
+)
+
+
+def build_cell_tables() -> tuple[np.ndarray, np.ndarray]:
+    shape = (len(POSSIBLE_PIECE_TYPES), ROTATION_STATES, CELLS_PER_PIECE)
+    cell_rows = np.zeros(shape, dtype=np.int64)
+    cell_cols = np.zeros(shape, dtype=np.int64)
+
+    for type_index, piece_type in enumerate(POSSIBLE_PIECE_TYPES):
+        rotations = PIECE_ROTATIONS[piece_type]
+
+        for rotation in range(ROTATION_STATES):
+            offsets = rotations[rotation % len(rotations)].offsets
+            cell_rows[type_index, rotation] = [row for row, _ in offsets]
+            cell_cols[type_index, rotation] = [col for _, col in offsets]
+
+    return cell_rows, cell_cols
+
+
+CELL_ROWS, CELL_COLS = build_cell_tables()
+
+
+class BatchSimulator:
+    # Runs one piece lock per board per step. A move is a rotation index and
+    # the grid column of the piece matrix's left edge; the piece falls
+    # straight down from the spawn row, as it would without further input.
+    boards: np.ndarray
+    piece_types: np.ndarray
+    next_piece_types: np.ndarray
+    scores: np.ndarray
+    lines_cleared: np.ndarray
+    levels: np.ndarray
+    pieces_placed: np.ndarray
+    is_running: np.ndarray
+
+    def __init__(
+        self,
+        size: int,
+        rows: int = Config.ROWS,
+        cols: int = Config.COLS,
+        seed: Optional[int] = None,
+    ):
+        self.size = size
+        self.rows = rows
+        self.cols = cols
+        self.rng = np.random.default_rng(seed)
+        self.spawn_cols = np.array(
+            [spawn_col(piece_type, cols) for piece_type in POSSIBLE_PIECE_TYPES],
+            dtype=np.int64,
+        )
+
+        self.boards = np.zeros((size, rows, cols), dtype=bool)
+        self.piece_types = np.zeros(size, dtype=np.int64)
+        self.next_piece_types = np.zeros(size, dtype=np.int64)
+        self.scores = np.zeros(size, dtype=np.int64)
+        self.lines_cleared = np.zeros(size, dtype=np.int64)
+        self.levels = np.ones(size, dtype=np.int64)
+        self.pieces_placed = np.zeros(size, dtype=np.int64)
+        self.is_running = np.zeros(size, dtype=bool)
+
+        self.reset()
+
+    def reset(self, mask: Optional[np.ndarray] = None):
+        if mask is None:
+            mask = np.ones(self.size, dtype=bool)
+
+        count = int(mask.sum())
+
+        self.boards[mask] = False
+        self.piece_types[mask] = self.random_piece_types(count)
+        self.next_piece_types[mask] = self.random_piece_types(count)
+        self.scores[mask] = 0
+        self.lines_cleared[mask] = 0
+        self.levels[mask] = 1
+        self.pieces_placed[mask] = 0
+        self.is_running[mask] = True
+
+    def random_piece_types(self, count: int) -> np.ndarray:
+        return self.rng.integers(0, len(POSSIBLE_PIECE_TYPES), size=count)
+
+    def landing_rows(
+        self,
+        piece_types: np.ndarray,
+        rotations: np.ndarray,
+        cols: np.ndarray,
+    ) -> np.ndarray:
+        rotations = rotations % ROTATION_STATES
+        cell_rows = CELL_ROWS[piece_types, rotations]
+        cell_cols = CELL_COLS[piece_types, rotations] + cols[:, None]
+        in_bounds = ((cell_cols >= 0) & (cell_cols < self.cols)).all(axis=1)
+        cell_cols = np.clip(cell_cols, 0, self.cols - 1)
+
+        boards = np.arange(self.size)
+        row_indexes = np.arange(self.rows)[None, :]
+        landing = np.full(self.size, self.rows, dtype=np.int64)
+
+        for cell in range(CELLS_PER_PIECE):
+            column = self.boards[boards, :, cell_cols[:, cell]]
+            blocked = column & (row_indexes >= cell_rows[:, cell, None])
+            first_blocked = np.where(
+                blocked.any(axis=1), blocked.argmax(axis=1), self.rows
+            )
+            landing = np.minimum(landing, first_blocked - cell_rows[:, cell])
+
+        landing -= 1
+
+        return np.where(in_bounds & (landing >= 0), landing, -1)
+
+    def step(
+        self, rotations: np.ndarray, cols: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rotations = np.asarray(rotations, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+
+        landing = self.landing_rows(self.piece_types, rotations, cols)
+        placed = self.is_running & (landing >= 0)
+        self.is_running &= placed
+
+        board_indexes = np.nonzero(placed)[0]
+        piece_types = self.piece_types[board_indexes]
+        piece_rotations = rotations[board_indexes] % ROTATION_STATES
+        cell_rows = CELL_ROWS[piece_types, piece_rotations]
+        cell_cols = CELL_COLS[piece_types, piece_rotations]
+        cell_rows += landing[board_indexes, None]
+        cell_cols += cols[board_indexes, None]
+        self.boards[board_indexes[:, None], cell_rows, cell_cols] = True
+        self.pieces_placed[placed] += 1
+
+        # The controller spawns the next piece before clearing lines, so the
+        # game over check runs against the board with the full rows in place.
+        self.piece_types[placed] = self.next_piece_types[placed]
+        self.next_piece_types[placed] = self.random_piece_types(len(board_indexes))
+
+        spawn_rows = self.landing_rows(
+            self.piece_types,
+            np.zeros(self.size, dtype=np.int64),
+            self.spawn_cols[self.piece_types],
+        )
+        self.is_running &= ~placed | (spawn_rows >= 0)
+
+        full_rows = self.boards.all(axis=2)
+        lines = full_rows.sum(axis=1) * placed
+        cleared = np.nonzero(lines)[0]
+
+        if len(cleared):
+            order = np.argsort(~full_rows[cleared], axis=1, kind="stable")
+            compacted = np.take_along_axis(
+                self.boards[cleared], order[:, :, None], axis=1
+            )
+            compacted &= (
+                np.arange(self.rows)[None, :] >= lines[cleared, None]
+            )[:, :, None]
+            self.boards[cleared] = compacted
+
+        rewards = LINE_SCORES[np.minimum(lines, CELLS_PER_PIECE)]
+        self.scores += rewards
+        self.lines_cleared += lines
+        self.levels = np.maximum(self.levels, self.lines_cleared // 10 + 1)
+
+        return lines, rewards
@@ -0,0 +1,273 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+from tetris.actions import Action
+from tetris.entities.bitboard_grid import BitboardGrid
+from tetris.entities.grid import Grid
+from tetris.entities.pieces import (
+    PieceFactory,
+    PieceType,
+    POSSIBLE_PIECE_TYPES,
+)
+from tetris.config import Config
+from tetris.simulation import Simulation
+
+SCRIPTED_ACTIONS = [
+    (Action.MOVE_LEFT,),
+    (),
+    (Action.ROTATE_CLOCKWISE,),
+    (),
+    (Action.MOVE_RIGHT,),
+    (Action.MOVE_RIGHT,),
+    (Action.SOFT_DROP,),
+    (Action.ROTATE_ANTICLOCKWISE,),
+    (Action.MOVE_LEFT,),
+    (Action.SOFT_DROP,),
+]
+
+GRID_TYPES = {"grid": Grid, "bitboard_grid": BitboardGrid}
+
+
+def measure(func, number, repeat):
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(number)
+        best = min(best, time.perf_counter() - start)
+
+    return best / number
+
+
+def drop_piece(grid, piece_type, col, rotation=0):
+    # Drops a piece from the top of the grid at a matrix column and returns
+    # it at its landing position without locking it
+    piece = PieceFactory().create_piece(piece_type, rotation)
+    piece.x = grid.x + 2 + 2 * col
+    piece.y = grid.y
+    piece.y += grid.drop_distance(piece, piece.x, piece.y)
+
+    return piece
+
+
+def build_grid(grid_type):
+    grid = grid_type(Config.ROWS, Config.COLS, x=0, y=0)
+
+    for col, piece_type in zip((0, 3, 6), (PieceType.O, PieceType.T, PieceType.L)):
+        grid.copy_piece_to_grid(drop_piece(grid, piece_type, col))
+
+    return grid
+
+
+def bench_can_place_piece_at(grid_type):
+    grid = build_grid(grid_type)
+    piece = PieceFactory().create_piece(PieceType.T)
+    positions = [
+        (2 + 2 * col, row) for row in range(Config.ROWS) for col in range(-1, 9)
+    ]
+
+    def run(number):
+        for x, y in itertools.islice(itertools.cycle(positions), number):
+            grid.can_place_piece_at(piece, x, y)
+
+    return run
+
+
+def bench_copy_piece_to_grid(grid_type):
+    # Stacks T pieces in three columns that never complete a row, starting
+    # over from an empty grid once the stacks reach the top
+    grid = grid_type(Config.ROWS, Config.COLS, x=0, y=0)
+    pieces = []
+
+    for col in itertools.cycle((0, 3, 6)):
+        piece = drop_piece(grid, PieceType.T, col)
+
+        if not grid.can_place_piece_at(piece, piece.x, piece.y):
+            break
+
+        grid.copy_piece_to_grid(piece)
+        pieces.append(piece)
+
+    def run(number):
+        for index in range(number):
+            if index % len(pieces) == 0:
+                grid.initialize_grid(grid.rows, grid.cols)
+
+            grid.copy_piece_to_grid(pieces[index % len(pieces)])
+
+    return run
+
+
+def bench_remove_and_shift_rows(grid_type):
+    # O pieces fill the two bottom rows but for the last two columns and a T
+    # rests on top of them. Every run locks the O that completes both rows,
+    # then removes them and moves the T down.
+    grid = grid_type(Config.ROWS, Config.COLS, x=0, y=0)
+
+    for col in range(-1, Config.COLS - 4, 2):
+        grid.copy_piece_to_grid(drop_piece(grid, PieceType.O, col))
+
+    grid.copy_piece_to_grid(drop_piece(grid, PieceType.T, 0))
+    last_piece = drop_piece(grid, PieceType.O, Config.COLS - 3)
+    snapshot = grid.snapshot()
+
+    def run(number):
+        for _ in range(number):
+            grid.restore(snapshot)
+            grid.copy_piece_to_grid(last_piece)
+            grid.shift_rows_down(grid.remove_full_rows())
+
+    return run
+
+
+def bench_rotate_piece():
+    piece = PieceFactory().create_piece(PieceType.T)
+
+    def run(number):
+        for _ in range(number):
+            piece.rotate_clockwise()
+            piece.rotate_anticlockwise()
+
+    return run
+
+
+def bench_create_piece():
+    piece_factory = PieceFactory()
+    piece_types = itertools.cycle(POSSIBLE_PIECE_TYPES)
+
+    def run(number):
+        for piece_type in itertools.islice(piece_types, number):
+            piece_factory.create_piece(piece_type)
+
+    return run
+
+
+def bench_full_game():
+    def run(number):
+        for seed in range(number):
+            simulation = Simulation()
+            simulation.reset(seed)
+            simulation.run(
+                lambda sim: SCRIPTED_ACTIONS[sim.ticks % len(SCRIPTED_ACTIONS)]
+            )
+
+    return run
+
+
+def bench_snapshot_and_restore():
+    simulation = Simulation()
+    simulation.reset(0)
+    simulation.run(
+        lambda sim: SCRIPTED_ACTIONS[sim.ticks % len(SCRIPTED_ACTIONS)],
+        max_ticks=1000,
+    )
+
+    def run(number):
+        for _ in range(number):
+            simulation.restore(simulation.snapshot())
+
+    return run
+
+
+def run_benchmarks(scale=1.0, repeat=5):
+    benchmarks = {}
+
+    for name, grid_type in GRID_TYPES.items():
+        benchmarks[f"{name}.can_place_piece_at"] = (
+            bench_can_place_piece_at(grid_type),
+            20000,
+        )
+        benchmarks[f"{name}.copy_piece_to_grid"] = (
+            bench_copy_piece_to_grid(grid_type),
+            20000,
+        )
+        benchmarks[f"{name}.remove_and_shift_rows"] = (
+            bench_remove_and_shift_rows(grid_type),
+            2000,
+        )
+
+    benchmarks["piece.rotate"] = (bench_rotate_piece(), 20000)
+    benchmarks["piece_factory.create_piece"] = (bench_create_piece(), 5000)
+    benchmarks["game.full_game"] = (bench_full_game(), 5)
+    benchmarks["game.snapshot_and_restore"] = (bench_snapshot_and_restore(), 20000)
+
+    results = {}
+
+    for name, (func, number) in benchmarks.items():
+        number = max(1, int(number * scale))
+        seconds = measure(func, number, repeat)
+        results[name] = {"seconds_per_op": seconds, "ops_per_second": 1 / seconds}
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        ratio = result["seconds_per_op"] / baseline[name]["seconds_per_op"]
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:<40}{ratio:>8.2f}x  {status}")
+
+        if status != "ok":
+            regressions.append(name)
+
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m tetris.benchmark",
+        description="Time the grid, piece and game hot paths without a terminal",
+    )
+    parser.add_argument("--output", metavar="FILE", help="write results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="FILE", help="compare against saved JSON results"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown ratio over the baseline reported as a regression",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply iteration counts"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmarks(scale=args.scale, repeat=args.repeat)
+
+    for name, result in results.items():
+        print(f"{name:<40}{result['seconds_per_op'] * 1e6:>12.3f} us/op")
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(
+                {"python": platform.python_version(), "results": results},
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Callable, Optional
+
+from tetris.config import Config
+
+END_OF_STREAM = None
+
+
+class Viewer:
+    frames: asyncio.Queue
+
+    def __init__(self, max_buffered_frames=Config.SPECTATOR_BUFFER_FRAMES):
+        self.frames = asyncio.Queue(max_buffered_frames)
+        self.needs_keyframe = True
+        self.dropped_frames = 0
+
+    def discard_frames(self):
+        while not self.frames.empty():
+            self.frames.get_nowait()
+            self.dropped_frames += 1
+
+    def close(self):
+        # Make room so the end of the stream is never lost to a full buffer
+        self.discard_frames()
+        self.frames.put_nowait(END_OF_STREAM)
+
+
+class Broadcaster:
+    # Every frame is encoded once by the session and the same bytes object is
+    # queued for all viewers. A viewer whose buffer is full drops what it has
+    # queued and restarts from a keyframe, so slow viewers never hold the game
+    # back or grow memory without bound.
+    viewers: set[Viewer]
+
+    def __init__(self):
+        self.viewers = set()
+
+    def subscribe(self, max_buffered_frames=Config.SPECTATOR_BUFFER_FRAMES) -> Viewer:
+        viewer = Viewer(max_buffered_frames)
+        self.viewers.add(viewer)
+
+        return viewer
+
+    def unsubscribe(self, viewer: Viewer):
+        self.viewers.discard(viewer)
+
+    def publish(self, delta: bytes, keyframe: Callable[[], bytes]):
+        encoded_keyframe: Optional[bytes] = None
+
+        for viewer in self.viewers:
+            if not viewer.needs_keyframe and viewer.frames.full():
+                viewer.discard_frames()
+                viewer.needs_keyframe = True
+
+            if viewer.needs_keyframe:
+                if encoded_keyframe is None:
+                    encoded_keyframe = keyframe()
+
+                viewer.frames.put_nowait(encoded_keyframe)
+                viewer.needs_keyframe = False
+            elif delta:
+                viewer.frames.put_nowait(delta)
+
+    def close(self):
+        for viewer in self.viewers:
+            viewer.close()
+
+        self.viewers.clear()
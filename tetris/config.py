@@ -1,14 +1,37 @@
 class Config:
     ROWS = 20
     COLS = 10
+    MIN_BOARD_SIZE = 4
+    MAX_BOARD_SIZE = 65535
+
+    SEED_BITS = 64
 
     COLOR_BLACK = 2
     COLOR_GREEN = 1
 
     EMPTY_CELL_ICON = " ·"
+    GHOST_CELL_ICON = "::"
 
     PIECE_SPEED = 0.25
     FAST_PIECE_SPEED = 0.1
     PIECE_SPEED_INCREMENT = 0.05
 
     RESET_TEXT_INTERVAL = 0.5
+
+    TICK_RATE = 60
+    MAX_UPDATES_PER_FRAME = 5
+    MAX_SKIPPED_FRAMES = 5
+
+    PROFILER_WINDOW = 600
+    PROFILER_KEY = "p"
+
+    SEARCH_CACHE_SIZE = 1024
+    SEARCH_LOOKAHEAD_WIDTH = 8
+
+    REWIND_KEY = "u"
+    REWIND_HISTORY_SECONDS = 10
+    REWIND_STEP_SECONDS = 1
+
+    SPECTATOR_BUFFER_FRAMES = 30
+
+    SCORE_INDEX_SIZE = 100
@@ -0,0 +1,81 @@
+from typing import Optional
+
+from tetris.entities.grid import Grid, compact
+from tetris.entities.pieces import Piece
+from tetris.entities.zobrist import mask_hash
+
+
+def shift_mask(mask: int, offset: int) -> int:
+    return mask << offset if offset >= 0 else mask >> -offset
+
+
+class BitboardGrid(Grid):
+    # Bit c of row_masks[r] is set when column c of row r is filled. The
+    # inherited cell matrix is only kept for rendering.
+    row_masks: list[int]
+    full_row_mask: int
+
+    def initialize_grid(self, rows, cols):
+        super().initialize_grid(rows, cols)
+
+        self.row_masks = [0] * rows
+        self.full_row_mask = (1 << cols) - 1
+
+    def copy_piece_to_grid(self, piece: Piece):
+        super().copy_piece_to_grid(piece)
+
+        grid_x = (piece.x - self.x - 2) // 2
+        grid_y = piece.y - self.y
+
+        for row_index, mask in piece.shape.filled_row_masks:
+            self.row_masks[grid_y + row_index] |= shift_mask(mask, grid_x)
+
+    def can_place_piece_at(
+        self, piece: Piece, x: int, y: int, rotation: Optional[int] = None
+    ):
+        grid_x = (x - 2 - self.x) // 2
+        grid_y = y - self.y
+        shape = piece.shape if rotation is None else piece.rotations[rotation]
+
+        for row_index, mask in shape.filled_row_masks:
+            row = grid_y + row_index
+
+            if row < 0 or row >= self.rows:
+                return False
+
+            if grid_x < 0:
+                if mask & ((1 << -grid_x) - 1):
+                    return False
+
+                mask >>= -grid_x
+            else:
+                mask <<= grid_x
+
+            if mask > self.full_row_mask or mask & self.row_masks[row]:
+                return False
+
+        return True
+
+    def remove_full_rows(self):
+        removed_rows = super().remove_full_rows()
+
+        for row_index in removed_rows:
+            self.row_masks[row_index] = 0
+
+        return removed_rows
+
+    def compact_rows(self, rows: list[int]):
+        super().compact_rows(rows)
+
+        compact(self.row_masks, self.top_row, rows, 0)
+
+    def snapshot(self) -> tuple:
+        return super().snapshot(), self.row_masks[:]
+
+    def restore(self, snapshot: tuple):
+        grid_snapshot, row_masks = snapshot
+        super().restore(grid_snapshot)
+        self.row_masks = row_masks[:]
+
+    def row_hash(self, row_index):
+        return mask_hash(self.row_masks[row_index], self.zobrist_keys[row_index])
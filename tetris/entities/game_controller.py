@@ -1,46 +1,66 @@
 import random
 import math
 
+from tetris.actions import Action
 from tetris.events import (
+    Event,
     PieceAddedEvent,
     GameOverEvent,
     LinesClearedEvent,
 )
 from tetris.events import Observable
-from tetris.entities.pieces import PieceFactory, POSSIBLE_PIECE_TYPES
+from tetris.entities.pieces import PieceFactory, POSSIBLE_PIECE_TYPES, spawn_col
 from tetris.config import Config
+from tetris.profiler import profiler
+from tetris.utils import calculate_score
 
 
 class GameController(Observable):
-    def __init__(self, grid, piece, stdscr):
+    events: list[Event]
+
+    def __init__(self, grid, piece, rng=None):
         super().__init__()
 
         self.grid = grid
         self.piece = piece
-        self.stdscr = stdscr
+        self.rng = rng or random.Random()
         self.piece_speed = Config.PIECE_SPEED
         self.piece_factory = PieceFactory()
+        self.events = []
+        self.rng_state = None
 
     def start(self):
+        self.events = []
         self.lines_cleared = 0
+        self.score = 0
+        self.pieces_placed = 0
         self.level = 1
         self.piece_speed = Config.PIECE_SPEED
         self.is_running = True
         self.can_move_piece_down = True
         self.piece_movement_timer = 0
         self.next_piece_type = None
+        self.rng_state = None
 
-        self.grid.initialize_grid(Config.ROWS, Config.COLS)
-        self.centralize_grid()
+        self.grid.initialize_grid(self.grid.rows, self.grid.cols)
         self.add_new_piece()
 
-    def update(self, dt):
-        self.centralize_grid()
+        return self.events
+
+    @profiler.phase("controller.update")
+    def update(self, dt, actions=(), moves_applied=False):
+        # moves_applied is set when handle_moves already ran for this tick's
+        # actions as soon as they arrived
+        self.events = []
 
         if not self.is_running:
-            return
+            return self.events
+
+        if moves_applied:
+            self.handle_speed(actions)
+        else:
+            self.handle_actions(actions)
 
-        self.handle_input()
         self.update_movement_timer(dt)
 
         if self.can_move_piece_down:
@@ -48,11 +68,13 @@ class GameController(Observable):
                 self.move_piece_down()
             else:
                 self.grid.copy_piece_to_grid(self.piece)
+                self.pieces_placed += 1
                 self.add_new_piece()
                 if self.grid.are_any_rows_full():
                     removed_row_indexes = self.grid.remove_full_rows()
                     self.grid.shift_rows_down(removed_row_indexes)
                     self.lines_cleared += len(removed_row_indexes)
+                    self.score += calculate_score(len(removed_row_indexes))
                     new_level = math.floor(self.lines_cleared / 10) + 1
 
                     if new_level > self.level:
@@ -60,18 +82,26 @@ class GameController(Observable):
 
                     self.notify_observers(LinesClearedEvent(len(removed_row_indexes)))
 
+        return self.events
+
+    def notify_observers(self, event: Event):
+        self.events.append(event)
+
+        super().notify_observers(event)
+
     def handle_level_up(self, new_level):
         self.level = new_level
         self.piece_speed += Config.PIECE_SPEED_INCREMENT
 
     def add_new_piece(self):
-        new_piece_type = self.next_piece_type or random.choice(POSSIBLE_PIECE_TYPES)
+        new_piece_type = self.next_piece_type or self.rng.choice(POSSIBLE_PIECE_TYPES)
         new_piece = self.piece_factory.create_piece(new_piece_type)
-        self.next_piece_type = random.choice(POSSIBLE_PIECE_TYPES)
+        self.next_piece_type = self.rng.choice(POSSIBLE_PIECE_TYPES)
+        self.rng_state = None
 
-        self.piece.matrix = new_piece.matrix
-        self.piece.x = (
-            self.grid.x + self.grid.width() - math.ceil(self.piece.width() / 2)
+        self.piece.copy_shape(new_piece)
+        self.piece.x = self.grid.x + 2 + 2 * spawn_col(
+            self.piece.piece_type, self.grid.cols
         )
         self.piece.y = self.grid.y
         self.piece.reached_bottom = False
@@ -83,6 +113,58 @@ class GameController(Observable):
             self.is_running = False
             self.notify_observers(GameOverEvent())
 
+    def snapshot(self) -> tuple:
+        # The generator only moves when a piece is added, so the snapshots
+        # taken while a piece falls share one copy of its state
+        if self.rng_state is None:
+            self.rng_state = self.rng.getstate()
+
+        return (
+            self.grid.snapshot(),
+            self.piece.piece_type,
+            self.piece.rotation,
+            self.piece.x - self.grid.x,
+            self.piece.y - self.grid.y,
+            self.piece.reached_bottom,
+            self.next_piece_type,
+            self.rng_state,
+            self.lines_cleared,
+            self.score,
+            self.pieces_placed,
+            self.level,
+            self.piece_speed,
+            self.is_running,
+            self.can_move_piece_down,
+            self.piece_movement_timer,
+        )
+
+    def restore(self, snapshot: tuple):
+        (
+            grid_snapshot,
+            piece_type,
+            rotation,
+            piece_x,
+            piece_y,
+            self.piece.reached_bottom,
+            self.next_piece_type,
+            self.rng_state,
+            self.lines_cleared,
+            self.score,
+            self.pieces_placed,
+            self.level,
+            self.piece_speed,
+            self.is_running,
+            self.can_move_piece_down,
+            self.piece_movement_timer,
+        ) = snapshot
+
+        self.grid.restore(grid_snapshot)
+        self.rng.setstate(self.rng_state)
+        self.piece.copy_shape(self.piece_factory.create_piece(piece_type, rotation))
+        # The piece is kept relative to the grid, which may have been moved
+        self.piece.x = self.grid.x + piece_x
+        self.piece.y = self.grid.y + piece_y
+
     def update_movement_timer(self, dt):
         self.piece_movement_timer += dt
 
@@ -94,36 +176,50 @@ class GameController(Observable):
         self.piece_movement_timer = 0
         self.piece.move_down()
 
-    def centralize_grid(self):
-        win_rows, win_cols = self.stdscr.getmaxyx()
+    def move_grid(self, x, y):
+        self.piece.x += x - self.grid.x
+        self.piece.y += y - self.grid.y
+        self.grid.x = x
+        self.grid.y = y
 
-        self.grid.x = (win_cols - 2 * Config.COLS - 2) // 2
-        self.grid.y = (win_rows - Config.ROWS - 2) // 2
+    def handle_actions(self, actions):
+        self.handle_moves(actions)
+        self.handle_speed(actions)
 
-    def handle_input(self):
-        key = self.stdscr.getch()
-
-        if key == ord("l"):
+    def handle_moves(self, actions):
+        if Action.MOVE_RIGHT in actions:
             if self.grid.can_place_piece_at(self.piece, self.piece.x + 2, self.piece.y):
                 self.piece.move_right()
 
-        if key == ord("h"):
+        if Action.MOVE_LEFT in actions:
             if self.grid.can_place_piece_at(self.piece, self.piece.x - 2, self.piece.y):
                 self.piece.move_left()
 
-        if key == ord("i"):
-            self.piece.rotate_clockwise()
+        if Action.ROTATE_CLOCKWISE in actions:
+            rotation = self.piece.clockwise_rotation()
+
+            if self.grid.can_place_piece_at(
+                self.piece, self.piece.x, self.piece.y, rotation
+            ):
+                self.piece.rotation = rotation
 
-            if not self.grid.can_place_piece_at(self.piece, self.piece.x, self.piece.y):
-                self.piece.rotate_anticlockwise()
+        if Action.ROTATE_ANTICLOCKWISE in actions:
+            rotation = self.piece.anticlockwise_rotation()
 
-        if key == ord("z"):
-            self.piece.rotate_anticlockwise()
+            if self.grid.can_place_piece_at(
+                self.piece, self.piece.x, self.piece.y, rotation
+            ):
+                self.piece.rotation = rotation
 
-            if not self.grid.can_place_piece_at(self.piece, self.piece.x, self.piece.y):
-                self.piece.rotate_clockwise()
+        if Action.HARD_DROP in actions:
+            self.piece.y += self.grid.drop_distance(
+                self.piece, self.piece.x, self.piece.y
+            )
+            # Lock the piece on this tick instead of waiting for the timer
+            self.can_move_piece_down = True
 
-        if key == ord("j"):
+    def handle_speed(self, actions):
+        if Action.SOFT_DROP in actions:
             self.piece_speed = Config.FAST_PIECE_SPEED
         else:
             self.piece_speed = Config.PIECE_SPEED
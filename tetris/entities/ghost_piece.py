@@ -0,0 +1,32 @@
+from tetris.config import Config
+from tetris.entities.grid import Grid
+from tetris.entities.pieces import GHOST_CELL, Piece
+from tetris.utils import draw_character
+
+
+class GhostPiece:
+    # Preview of where the falling piece lands on a hard drop
+    visible: bool
+
+    def __init__(self, grid: Grid, piece: Piece, visible=True):
+        self.grid = grid
+        self.piece = piece
+        self.visible = visible
+
+    def draw(self, screen):
+        if not self.visible:
+            return
+
+        distance = self.grid.drop_distance(self.piece, self.piece.x, self.piece.y)
+
+        if distance == 0:
+            return
+
+        for row_index, col_index, text in self.piece.shape.runs:
+            draw_character(
+                screen,
+                self.piece.y + distance + row_index,
+                self.piece.x + 2 * col_index,
+                GHOST_CELL.icon * (len(text) // len(GHOST_CELL.icon)),
+                Config.COLOR_GREEN,
+            )
@@ -1,14 +1,33 @@
-from tetris.entities.pieces import Piece, Cell
+import bisect
+from typing import Optional
+
+from tetris.entities.pieces import EMPTY_CELL, Piece, Cell
+from tetris.entities.zobrist import zobrist_keys
 from tetris.config import Config
-from tetris.utils import draw_character
+from tetris.profiler import profiler
+from tetris.utils import draw_clipped
+
+
+def compact(values: list, top: int, removed_rows: list[int], blank):
+    # Drops the removed rows and moves the rows from top down in a single
+    # slice assignment. Rows above top are blank and stay where they are.
+    last = removed_rows[-1]
+    removed = set(removed_rows)
+    kept = [values[index] for index in range(top, last + 1) if index not in removed]
+    values[top : last + 1] = [blank] * len(removed_rows) + kept
 
 
 class Grid:
-    grid: list[list["Cell"]]
+    grid: list[tuple["Cell", ...]]
     x: int
     y: int
     rows: int
     cols: int
+    hash: int
+    column_tops: list[int]
+    row_counts: list[int]
+    top_row: int
+    locked_rows: range
 
     def __init__(self, rows, cols, x, y):
         self.x = x
@@ -18,49 +37,61 @@ class Grid:
         self.initialize_grid(rows, cols)
 
     def initialize_grid(self, rows, cols):
-        self.grid = [
-            [
-                Cell(x, y, None, Config.EMPTY_CELL_ICON, is_empty=True)
-                for x in range(cols)
-            ]
-            for y in range(rows)
-        ]
+        # Rows are immutable and replaced when a piece lands on them, so empty
+        # rows all share one row and snapshots share rows with the grid.
+        self.blank_row = (EMPTY_CELL,) * cols
+        self.grid = [self.blank_row] * rows
+        self.zobrist_keys = zobrist_keys(rows, cols)
+        self.hash = 0
+        # Highest filled row of each column, rows when the column is empty
+        self.column_tops = [rows] * cols
+        # Filled cells per row. Every row above top_row is empty, and only
+        # the rows the last piece locked into can have become full.
+        self.row_counts = [0] * rows
+        self.top_row = rows
+        self.locked_rows = range(0)
 
+    @profiler.phase("grid.draw")
     def draw(self, screen):
-        for i in range(self.rows):
-            draw_character(screen, self.y + i, self.x, "<!", Config.COLOR_GREEN)
-            draw_character(
-                screen, self.y + i, self.x + 2 * self.cols + 2, "!>", Config.COLOR_GREEN
-            )
-
-        draw_character(screen, self.y + self.rows, self.x, "<!", Config.COLOR_GREEN)
-        draw_character(
+        # Every visible row of the well, walls included, is drawn as one
+        # string, and only the part of the well inside the terminal is drawn
+        screen_rows, screen_cols = screen.size()
+        first_row = max(0, -self.y)
+        last_row = min(self.rows, screen_rows - self.y)
+        first_col = max(0, (-self.x - 1) // 2)
+        last_col = max(first_col, min(self.cols, (screen_cols - self.x - 2) // 2))
+        left_wall = "<!" if first_col == 0 else ""
+        right_wall = "!>" if last_col == self.cols else ""
+        x = self.x + 2 * first_col + 2 - len(left_wall)
+        blank_text = (
+            left_wall + Config.EMPTY_CELL_ICON * (last_col - first_col) + right_wall
+        )
+
+        for i in range(first_row, max(first_row, last_row)):
+            row = self.grid[i]
+
+            if i < self.top_row or row is self.blank_row:
+                text = blank_text
+            else:
+                cells = "".join([cell.icon for cell in row[first_col:last_col]])
+                text = left_wall + cells + right_wall
+
+            draw_clipped(screen, self.y + i, x, text, Config.COLOR_GREEN)
+
+        draw_clipped(
             screen,
             self.y + self.rows,
-            self.x + 2 * self.cols + 2,
-            "!>",
+            x,
+            left_wall + "==" * (last_col - first_col) + right_wall,
+            Config.COLOR_GREEN,
+        )
+        draw_clipped(
+            screen,
+            self.y + self.rows + 1,
+            x + len(left_wall),
+            "\\/" * (last_col - first_col),
             Config.COLOR_GREEN,
         )
-        for i in range(2 * self.cols):
-            draw_character(
-                screen, self.y + self.rows, self.x + i + 2, "=", Config.COLOR_GREEN
-            )
-
-        for i in range(self.cols):
-            draw_character(
-                screen,
-                self.y + self.rows + 1,
-                self.x + i * 2 + 2,
-                "\\/",
-                Config.COLOR_GREEN,
-            )
-
-        for row_index, row in enumerate(self.grid):
-            for col_index, cell in enumerate(row):
-                if cell is not None:
-                    cell.x = self.x + 2 * col_index + 2
-                    cell.y = self.y + row_index
-                    cell.draw(screen)
 
     def width(self):
         return self.cols
@@ -69,71 +100,181 @@ class Grid:
         return self.rows
 
     def copy_piece_to_grid(self, piece: Piece):
-        for row_index, row in enumerate(piece.matrix):
-            for col_index, cell in enumerate(row):
-                if cell is not None:
-                    grid_x = (piece.x - self.x - 2) // 2
-                    grid_y = piece.y - self.y
+        grid_x = (piece.x - self.x - 2) // 2
+        grid_y = piece.y - self.y
+        matrix = piece.matrix
+        offsets = piece.shape.offsets
+        self.locked_rows = range(grid_y + offsets[0][0], grid_y + offsets[-1][0] + 1)
+        rows = {row_index: list(self.grid[row_index]) for row_index in self.locked_rows}
 
-                    self.grid[grid_y + row_index][grid_x + col_index] = cell
+        for row_index, col_index in offsets:
+            row = rows[grid_y + row_index]
 
-    def can_place_piece_at(self, piece: Piece, x: int, y: int):
+            if row[grid_x + col_index].is_empty:
+                self.row_counts[grid_y + row_index] += 1
+
+            row[grid_x + col_index] = matrix[row_index][col_index]
+            self.hash ^= self.zobrist_keys[grid_y + row_index][grid_x + col_index]
+
+            if grid_y + row_index < self.column_tops[grid_x + col_index]:
+                self.column_tops[grid_x + col_index] = grid_y + row_index
+
+        for row_index, row in rows.items():
+            self.grid[row_index] = tuple(row)
+
+        self.top_row = min(self.top_row, self.locked_rows.start)
+
+    def can_place_piece_at(
+        self, piece: Piece, x: int, y: int, rotation: Optional[int] = None
+    ):
         grid_x = (x - 2 - self.x) // 2
         grid_y = y - self.y
+        shape = piece.shape if rotation is None else piece.rotations[rotation]
 
-        for row_index, row in enumerate(piece.matrix):
-            for col_index, _ in enumerate(row):
-                if piece.matrix[row_index][col_index] is None:
-                    continue
-
-                if grid_y + row_index < 0 or grid_y + row_index >= self.rows:
-                    return False
+        for row_index, col_index in shape.offsets:
+            if grid_y + row_index < 0 or grid_y + row_index >= self.rows:
+                return False
 
-                if grid_x + col_index < 0 or grid_x + col_index >= self.cols:
-                    return False
+            if grid_x + col_index < 0 or grid_x + col_index >= self.cols:
+                return False
 
-                grid_cell = self.grid[grid_y + row_index][grid_x + col_index]
+            grid_cell = self.grid[grid_y + row_index][grid_x + col_index]
 
-                if not grid_cell.is_empty:
-                    return False
+            if not grid_cell.is_empty:
+                return False
 
         return True
 
-    def are_any_rows_full(self):
-        for row in self.grid:
-            if all([not cell.is_empty for cell in row]):
-                return True
+    def drop_distance(
+        self, piece: Piece, x: int, y: int, rotation: Optional[int] = None
+    ) -> int:
+        # How many rows the piece can fall from (x, y), read off the column
+        # tops below each of its columns
+        grid_x = (x - 2 - self.x) // 2
+        grid_y = y - self.y
+        shape = piece.shape if rotation is None else piece.rotations[rotation]
+        distance = self.rows
 
-        return False
+        for col_index, bottom in shape.column_bottoms:
+            row = grid_y + bottom
+            top = self.column_tops[grid_x + col_index]
 
-    def remove_full_rows(self):
-        removed_rows = []
+            if top <= row:
+                # The piece is tucked under an overhang, so the column tops
+                # say nothing about the cells below it
+                return self.scan_drop_distance(piece, x, y, rotation)
+
+            distance = min(distance, top - row - 1)
+
+        return distance
 
-        for row_index, row in enumerate(self.grid):
-            if self.is_row_full(row):
-                self.grid[row_index] = [
-                    Cell(0, 0, None, Config.EMPTY_CELL_ICON, is_empty=True) for _ in row
-                ]
+    def scan_drop_distance(
+        self, piece: Piece, x: int, y: int, rotation: Optional[int] = None
+    ) -> int:
+        distance = 0
 
-                removed_rows.append(row_index)
+        while self.can_place_piece_at(piece, x, y + distance + 1, rotation):
+            distance += 1
+
+        return distance
+
+    def are_any_rows_full(self):
+        return any(
+            self.row_counts[row_index] == self.cols for row_index in self.locked_rows
+        )
+
+    def remove_full_rows(self):
+        removed_rows = [
+            row_index
+            for row_index in self.locked_rows
+            if self.row_counts[row_index] == self.cols
+        ]
+
+        for row_index in removed_rows:
+            self.hash ^= self.row_hash(row_index)
+            self.grid[row_index] = self.empty_row()
+            self.row_counts[row_index] = 0
 
         return removed_rows
 
     def shift_rows_down(self, rows: list[int]):
-        for i, row_index in enumerate(rows):
-            self.grid.pop(row_index - i)
-
-        for _ in range(len(rows)):
-            self.grid.insert(
-                0,
-                [
-                    Cell(0, 0, None, Config.EMPTY_CELL_ICON, is_empty=True)
-                    for _ in range(self.cols)
-                ],
-            )
+        if not rows:
+            return
+
+        self.update_column_tops(rows)
+        self.hash ^= self.rows_hash(max(rows))
+        self.compact_rows(rows)
+        self.hash ^= self.rows_hash(max(rows))
+
+        # The stack only moves down, so the new top is found below the old one
+        while self.top_row < self.rows and not self.row_counts[self.top_row]:
+            self.top_row += 1
+
+    def compact_rows(self, rows: list[int]):
+        compact(self.grid, self.top_row, rows, self.blank_row)
+        compact(self.row_counts, self.top_row, rows, 0)
+
+    def update_column_tops(self, removed_rows: list[int]):
+        # Called after the full rows were emptied and before the rows above
+        # them move down. A column top that was cleared moves to the next
+        # filled cell below it, then every top moves down by the number of
+        # removed rows beneath it.
+        for col_index, row_index in enumerate(self.column_tops):
+            while row_index < self.rows and self.grid[row_index][col_index].is_empty:
+                row_index += 1
+
+            if row_index < self.rows:
+                row_index += len(removed_rows) - bisect.bisect_right(
+                    removed_rows, row_index
+                )
+
+            self.column_tops[col_index] = row_index
+
+    def row_hash(self, row_index):
+        value = 0
+
+        for col_index, cell in enumerate(self.grid[row_index]):
+            if not cell.is_empty:
+                value ^= self.zobrist_keys[row_index][col_index]
+
+        return value
+
+    def rows_hash(self, last_row_index):
+        value = 0
+
+        for row_index in range(self.top_row, last_row_index + 1):
+            if self.row_counts[row_index]:
+                value ^= self.row_hash(row_index)
+
+        return value
+
+    def snapshot(self) -> tuple:
+        # Only the lists of rows and counters are copied, the rows themselves
+        # are shared since they are never written to
+        return (
+            self.grid[:],
+            self.row_counts[:],
+            self.column_tops[:],
+            self.top_row,
+            self.locked_rows,
+            self.hash,
+        )
+
+    def restore(self, snapshot: tuple):
+        grid, row_counts, column_tops, top_row, locked_rows, grid_hash = snapshot
+        # Copied again so that the snapshot can be restored more than once
+        self.grid = grid[:]
+        self.row_counts = row_counts[:]
+        self.column_tops = column_tops[:]
+        self.top_row = top_row
+        self.locked_rows = locked_rows
+        self.hash = grid_hash
+
+    def empty_row(self):
+        return self.blank_row
 
     def is_row_full(self, row):
         return all([not cell.is_empty for cell in row])
 
     def is_row_empty(self, row):
-        return all([cell.is_empty for cell in row])
+        return row is self.blank_row or all([cell.is_empty for cell in row])
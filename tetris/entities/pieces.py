@@ -1,3 +1,4 @@
+import math
 from typing import Optional
 from enum import Enum, auto
 
@@ -64,84 +65,178 @@ PIECE_TYPE_SHAPES = {
 }
 
 
-def build_piece_from_matrix(matrix: list[list[int]]) -> list[list["Cell"]]:
-    piece_matrix = []
+class Cell:
+    # Cells carry no position and are shared between every square that looks
+    # the same, positions are worked out by whoever draws them.
+    __slots__ = ("icon", "is_empty")
 
-    for i in range(len(matrix)):
-        piece_matrix.append([])
+    icon: str
+    is_empty: bool
 
-        for j in range(len(matrix[i])):
-            if matrix[i][j] == 1:
-                piece_matrix[i].append(Cell(0, 0, None, is_empty=False))
-            else:
-                piece_matrix[i].append(None)
+    def __init__(self, icon: str = "[]", is_empty: bool = False):
+        self.icon = icon
+        self.is_empty = is_empty
 
-    return piece_matrix
+    def draw(self, screen, y: int, x: int):
+        draw_character(screen, y, x, self.icon, Config.COLOR_GREEN)
 
 
-class PieceFactory:
-    def create_piece(self, piece_type: "PieceType", rotation=0) -> "Piece":
-        piece =  Piece(
-            matrix=build_piece_from_matrix(PIECE_TYPE_SHAPES[piece_type]),
-            rotatable=piece_type != PieceType.O,
+EMPTY_CELL = Cell(Config.EMPTY_CELL_ICON, is_empty=True)
+BLOCK_CELL = Cell()
+GHOST_CELL = Cell(Config.GHOST_CELL_ICON)
+
+
+def build_piece_from_matrix(matrix: list[list[int]]) -> list[list[Optional[Cell]]]:
+    return [[BLOCK_CELL if value == 1 else None for value in row] for row in matrix]
+
+
+def build_cell_runs(
+    cells: list[list[Optional[Cell]]],
+) -> tuple[tuple[int, int, str], ...]:
+    # (row, col, text) for every horizontal run of cells, so that a piece is
+    # drawn with one call per run instead of one per cell
+    runs = []
+
+    for row_index, row in enumerate(cells):
+        col_index = 0
+
+        while col_index < len(row):
+            if row[col_index] is None:
+                col_index += 1
+                continue
+
+            start = col_index
+
+            while col_index < len(row) and row[col_index] is not None:
+                col_index += 1
+
+            text = "".join(cell.icon for cell in row[start:col_index])
+            runs.append((row_index, start, text))
+
+    return tuple(runs)
+
+
+def rotate_matrix_clockwise(matrix: list[list]) -> list[list]:
+    return [list(column)[::-1] for column in zip(*matrix)]
+
+
+class PieceRotation:
+    shape: list[list[int]]
+    cells: list[list[Optional[Cell]]]
+    offsets: tuple[tuple[int, int], ...]
+    row_masks: tuple[int, ...]
+    filled_row_masks: tuple[tuple[int, int], ...]
+    column_bottoms: tuple[tuple[int, int], ...]
+    runs: tuple[tuple[int, int, str], ...]
+
+    def __init__(self, shape: list[list[int]]):
+        self.shape = shape
+        self.cells = build_piece_from_matrix(shape)
+        self.runs = build_cell_runs(self.cells)
+        self.offsets = tuple(
+            (row_index, col_index)
+            for row_index, row in enumerate(shape)
+            for col_index, value in enumerate(row)
+            if value == 1
+        )
+        self.row_masks = tuple(
+            sum(1 << col_index for col_index, value in enumerate(row) if value == 1)
+            for row in shape
+        )
+        self.filled_row_masks = tuple(
+            (row_index, mask) for row_index, mask in enumerate(self.row_masks) if mask
         )
+        # Lowest filled row of every column the piece occupies, offsets are
+        # ordered by row so the last one seen in each column wins
+        bottoms = {col_index: row_index for row_index, col_index in self.offsets}
+        self.column_bottoms = tuple(sorted(bottoms.items()))
 
-        for _ in range(rotation):
-            piece.rotate_clockwise()
+    def width(self):
+        return len(self.shape[0])
 
-        return piece
+    def height(self):
+        return len(self.shape)
 
 
-class Cell:
-    x: int
-    y: int
-    is_empty: bool
+def build_piece_rotations(piece_type: "PieceType") -> tuple[PieceRotation, ...]:
+    shape = PIECE_TYPE_SHAPES[piece_type]
 
-    def __init__(
-        self,
-        x: int,
-        y: int,
-        parent: Optional["Piece"],
-        icon: str = "[]",
-        is_empty: bool = False,
-    ):
-        self.x = x
-        self.y = y
-        self.parent = parent
-        self.icon = icon
-        self.is_empty = is_empty
+    if piece_type == PieceType.O:
+        return (PieceRotation(shape),)
 
-    def draw(self, screen):
-        draw_character(screen, self.y, self.x, self.icon, Config.COLOR_GREEN)
+    rotations = []
+
+    for _ in range(4):
+        rotations.append(PieceRotation(shape))
+        shape = rotate_matrix_clockwise(shape)
+
+    return tuple(rotations)
+
+
+PIECE_ROTATIONS = {
+    piece_type: build_piece_rotations(piece_type) for piece_type in POSSIBLE_PIECE_TYPES
+}
+
+
+def spawn_col(piece_type: PieceType, cols: int) -> int:
+    # Column of the left edge of a new piece's matrix, centered on the well.
+    # With an odd number of columns the piece leans a column to the left.
+    return (cols - math.ceil(PIECE_ROTATIONS[piece_type][0].width() / 2) - 2) // 2
+
+
+class PieceFactory:
+    def create_piece(self, piece_type: "PieceType", rotation=0) -> "Piece":
+        return Piece(piece_type, rotation)
 
 
 class Piece:
     x: int
     y: int
-    matrix: list[list[Cell]]
+    piece_type: PieceType
+    rotations: tuple[PieceRotation, ...]
+    rotation: int
     grid: "Grid"
-    rotatable: bool
 
-    def __init__(self, matrix: list[list[Cell]], rotatable: bool = True):
+    def __init__(self, piece_type: PieceType, rotation: int = 0):
         self.x = 0
         self.y = 0
-        self.matrix = matrix
+        self.piece_type = piece_type
+        self.rotations = PIECE_ROTATIONS[piece_type]
+        self.rotation = rotation % len(self.rotations)
         self.reached_bottom = False
-        self.rotatable = rotatable
+
+    @property
+    def matrix(self) -> list[list[Optional[Cell]]]:
+        return self.rotations[self.rotation].cells
+
+    @property
+    def shape(self) -> PieceRotation:
+        return self.rotations[self.rotation]
+
+    @property
+    def rotatable(self) -> bool:
+        return len(self.rotations) > 1
+
+    def copy_shape(self, piece: "Piece"):
+        self.piece_type = piece.piece_type
+        self.rotations = piece.rotations
+        self.rotation = piece.rotation
 
     def draw(self, screen):
-        for row_index, row in enumerate(self.matrix):
-            for col_index, cell in enumerate(row):
-                if cell is not None:
-                    cell.x = self.x + col_index * 2
-                    cell.y = self.y + row_index
-                    cell.draw(screen)
+        for row_index, col_index, text in self.shape.runs:
+            draw_character(
+                screen,
+                self.y + row_index,
+                self.x + col_index * 2,
+                text,
+                Config.COLOR_GREEN,
+            )
 
     def width(self):
-        return len(self.matrix[0])
+        return self.shape.width()
 
     def height(self):
-        return len(self.matrix)
+        return self.shape.height()
 
     def move_right(self):
         self.x += 2
@@ -152,20 +247,14 @@ class Piece:
     def move_down(self):
         self.y += 1
 
-    def rotate_clockwise(self):
-        if not self.rotatable:
-            return
+    def clockwise_rotation(self) -> int:
+        return (self.rotation + 1) % len(self.rotations)
 
-        self.matrix = [
-            list(map(lambda x: x[i], self.matrix))[::-1]
-            for i in range(len(self.matrix[0]))
-        ]
+    def anticlockwise_rotation(self) -> int:
+        return (self.rotation - 1) % len(self.rotations)
 
-    def rotate_anticlockwise(self):
-        if not self.rotatable:
-            return
+    def rotate_clockwise(self):
+        self.rotation = self.clockwise_rotation()
 
-        self.matrix = [
-            [self.matrix[j][i] for j in range(len(self.matrix))]
-            for i in range(len(self.matrix[0]) - 1, -1, -1)
-        ]
+    def rotate_anticlockwise(self):
+        self.rotation = self.anticlockwise_rotation()
@@ -22,4 +22,4 @@ class ScoreText(Text):
         return " " * (self.max_score_length - len(str(self.score)))
 
     def width(self):
-        return super().width() + self.max_score_length
+        return super().width() + max(self.max_score_length, len(str(self.score)))
@@ -0,0 +1,59 @@
+import random
+from functools import lru_cache
+from typing import Optional
+
+ZOBRIST_SEED = 0x7E7A15
+ZOBRIST_BITS = 64
+
+
+class ZobristKeys:
+    # Rows of keys are generated on first use, so a huge well only pays for
+    # the rows that pieces actually reach
+    row_keys: list[Optional[tuple[int, ...]]]
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.row_keys = [None] * rows
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row_index: int) -> tuple[int, ...]:
+        row_keys = self.row_keys[row_index]
+
+        if row_keys is None:
+            rng = random.Random(ZOBRIST_SEED + (row_index % self.rows << 32))
+            row_keys = tuple(rng.getrandbits(ZOBRIST_BITS) for _ in range(self.cols))
+            self.row_keys[row_index] = row_keys
+
+        return row_keys
+
+    def __iter__(self):
+        return (self[row_index] for row_index in range(self.rows))
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(rows: int, cols: int) -> ZobristKeys:
+    return ZobristKeys(rows, cols)
+
+
+def mask_hash(mask: int, row_keys: tuple[int, ...]) -> int:
+    value = 0
+
+    while mask:
+        bit = mask & -mask
+        value ^= row_keys[bit.bit_length() - 1]
+        mask ^= bit
+
+    return value
+
+
+def masks_hash(masks, keys: ZobristKeys) -> int:
+    value = 0
+
+    for row_index, mask in enumerate(masks):
+        if mask:
+            value ^= mask_hash(mask, keys[row_index])
+
+    return value
@@ -0,0 +1,169 @@
+from typing import Optional
+
+import numpy as np
+
+from tetris.batch import CELL_COLS, ROTATION_STATES, BatchSimulator
+from tetris.config import Config
+from tetris.entities.pieces import POSSIBLE_PIECE_TYPES, PieceType
+
+# Leftmost filled column of every piece type and rotation inside its matrix
+MIN_CELL_COLS = CELL_COLS.min(axis=2)
+
+
+def read_only_view(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+
+    return view
+
+
+class VectorEnv:
+    # Gym-style environment that plays num_envs games at once, one piece lock
+    # per game per step. An action is rotation * cols + col, where col is the
+    # board column of the leftmost filled cell of the rotated piece. An
+    # action that does not fit ends the game.
+    #
+    # Observations are read-only views over the simulator arrays, so they are
+    # never copied and always show the current state: keep a copy if an older
+    # step is needed. Games that ended are reset on the following step, which
+    # ignores their action, so the last board of a game can still be seen.
+    def __init__(
+        self,
+        num_envs: int,
+        rows: int = Config.ROWS,
+        cols: int = Config.COLS,
+        seed: Optional[int] = None,
+        max_pieces: Optional[int] = None,
+    ):
+        self.num_envs = num_envs
+        self.rows = rows
+        self.cols = cols
+        self.max_pieces = max_pieces
+        self.action_count = ROTATION_STATES * cols
+        self.simulator = BatchSimulator(num_envs, rows, cols, seed)
+        self.needs_reset = np.zeros(num_envs, dtype=bool)
+        self.observation = {
+            "board": read_only_view(self.simulator.boards),
+            "piece": read_only_view(self.simulator.piece_types),
+            "next_piece": read_only_view(self.simulator.next_piece_types),
+        }
+
+    def info(self) -> dict:
+        return {
+            "score": read_only_view(self.simulator.scores),
+            "lines_cleared": read_only_view(self.simulator.lines_cleared),
+            "pieces_placed": read_only_view(self.simulator.pieces_placed),
+        }
+
+    def reset(self, seed: Optional[int] = None) -> tuple[dict, dict]:
+        if seed is not None:
+            self.simulator.rng = np.random.default_rng(seed)
+
+        self.simulator.reset()
+        self.needs_reset[:] = False
+
+        return self.observation, self.info()
+
+    def decode_actions(self, actions) -> tuple[np.ndarray, np.ndarray]:
+        actions = np.asarray(actions, dtype=np.int64)
+        rotations = actions // self.cols
+        cols = actions % self.cols
+        cols -= MIN_CELL_COLS[self.simulator.piece_types, rotations % ROTATION_STATES]
+
+        return rotations, cols
+
+    def action_mask(self) -> np.ndarray:
+        # (num_envs, action_count) mask of the actions that place the current
+        # piece without ending the game
+        mask = np.zeros((self.num_envs, self.action_count), dtype=bool)
+
+        for action in range(self.action_count):
+            rotations, cols = self.decode_actions(
+                np.full(self.num_envs, action, dtype=np.int64)
+            )
+            landing = self.simulator.landing_rows(
+                self.simulator.piece_types, rotations, cols
+            )
+            mask[:, action] = landing >= 0
+
+        return mask
+
+    def step(self, actions) -> tuple[dict, np.ndarray, np.ndarray, np.ndarray, dict]:
+        if self.needs_reset.any():
+            self.simulator.reset(self.needs_reset)
+
+        rotations, cols = self.decode_actions(actions)
+        was_reset = self.needs_reset.copy()
+        # Keep the games that were just reset out of this step
+        self.simulator.is_running &= ~was_reset
+        _, rewards = self.simulator.step(rotations, cols)
+        self.simulator.is_running |= was_reset
+        rewards[was_reset] = 0
+
+        terminated = ~self.simulator.is_running
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        if self.max_pieces is not None:
+            truncated = ~terminated & (self.simulator.pieces_placed >= self.max_pieces)
+
+        self.needs_reset = terminated | truncated
+
+        return self.observation, rewards, terminated, truncated, self.info()
+
+
+class TetrisEnv:
+    # Single game with the same rules, actions and views as VectorEnv. It does
+    # not reset itself: call reset once the game is terminated or truncated.
+    def __init__(
+        self,
+        rows: int = Config.ROWS,
+        cols: int = Config.COLS,
+        seed: Optional[int] = None,
+        max_pieces: Optional[int] = None,
+    ):
+        self.vector_env = VectorEnv(1, rows, cols, seed, max_pieces)
+        self.action_count = self.vector_env.action_count
+        self.terminated = False
+        self.truncated = False
+        self.observation = {
+            name: view[0] if name == "board" else view[0:1].reshape(())
+            for name, view in self.vector_env.observation.items()
+        }
+
+    @property
+    def piece_type(self) -> PieceType:
+        return POSSIBLE_PIECE_TYPES[int(self.observation["piece"])]
+
+    @property
+    def next_piece_type(self) -> PieceType:
+        return POSSIBLE_PIECE_TYPES[int(self.observation["next_piece"])]
+
+    def info(self) -> dict:
+        return {name: int(value[0]) for name, value in self.vector_env.info().items()}
+
+    def reset(self, seed: Optional[int] = None) -> tuple[dict, dict]:
+        self.vector_env.reset(seed)
+        self.terminated = False
+        self.truncated = False
+
+        return self.observation, self.info()
+
+    def action_mask(self) -> np.ndarray:
+        return self.vector_env.action_mask()[0]
+
+    def step(self, action: int) -> tuple[dict, int, bool, bool, dict]:
+        # Stepping a finished game is a no-op instead of a silent reset
+        if self.vector_env.needs_reset[0]:
+            return self.observation, 0, self.terminated, self.truncated, self.info()
+
+        _, rewards, terminated, truncated, _ = self.vector_env.step([action])
+        self.terminated = bool(terminated[0])
+        self.truncated = bool(truncated[0])
+
+        return (
+            self.observation,
+            int(rewards[0]),
+            self.terminated,
+            self.truncated,
+            self.info(),
+        )
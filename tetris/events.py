@@ -1,3 +1,5 @@
+from typing import Callable
+
 from tetris.entities.pieces import PieceType
 
 
@@ -5,16 +7,97 @@ class Event:
     pass
 
 
+class Subscription:
+    def __init__(
+        self,
+        bus: "EventBus",
+        event_type: type,
+        handler: Callable[[Event], None],
+        queued: bool,
+        coalesce: bool,
+    ):
+        self.bus = bus
+        self.event_type = event_type
+        self.handler = handler
+        self.queued = queued
+        self.coalesce = coalesce
+
+    def cancel(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    # Handlers subscribe to an event type and receive its subclasses too.
+    # Queued handlers only run on flush(); coalescing ones get the latest
+    # event they were sent since the previous flush.
+    subscriptions: dict[type, list[Subscription]]
+    pending: dict[Subscription, list[Event]]
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.pending = {}
+        self.dispatch_cache = {}
+
+    def subscribe(
+        self,
+        event_type: type,
+        handler: Callable[[Event], None],
+        queued: bool = False,
+        coalesce: bool = False,
+    ) -> Subscription:
+        subscription = Subscription(self, event_type, handler, queued, coalesce)
+        self.subscriptions.setdefault(event_type, []).append(subscription)
+        self.dispatch_cache.clear()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscriptions.get(subscription.event_type, [])
+
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+            self.pending.pop(subscription, None)
+            self.dispatch_cache.clear()
+
+    def subscriptions_for(self, event_type: type) -> list[Subscription]:
+        subscriptions = self.dispatch_cache.get(event_type)
+
+        if subscriptions is None:
+            subscriptions = [
+                subscription
+                for base in event_type.__mro__
+                for subscription in self.subscriptions.get(base, ())
+            ]
+            self.dispatch_cache[event_type] = subscriptions
+
+        return subscriptions
+
+    def publish(self, event: Event):
+        for subscription in self.subscriptions_for(type(event)):
+            if not subscription.queued:
+                subscription.handler(event)
+            elif subscription.coalesce:
+                self.pending[subscription] = [event]
+            else:
+                self.pending.setdefault(subscription, []).append(event)
+
+    def flush(self):
+        pending, self.pending = self.pending, {}
+
+        for subscription, events in pending.items():
+            for event in events:
+                subscription.handler(event)
+
+
 class Observable:
     def __init__(self):
-        self.observers = []
+        self.event_bus = EventBus()
 
-    def add_observer(self, observer):
-        self.observers.append(observer)
+    def add_observer(self, observer) -> Subscription:
+        return self.event_bus.subscribe(Event, observer)
 
     def notify_observers(self, event: Event):
-        for observer in self.observers:
-            observer(event)
+        self.event_bus.publish(event)
 
 
 class PieceAddedEvent(Event):
@@ -0,0 +1,60 @@
+from tetris.config import Config
+from tetris.gui.renderer import FrameBuffer, compose_row
+
+ESCAPE = "\x1b["
+
+ANSI_COLORS = {
+    Config.COLOR_GREEN: f"{ESCAPE}32;40m",
+    Config.COLOR_BLACK: f"{ESCAPE}30;40m",
+}
+
+
+class AnsiRenderer(FrameBuffer):
+    # Same row diffing as the curses renderer, but present() returns the
+    # escape sequences for the changed rows so they can be sent to a socket.
+    output: list[str]
+
+    def __init__(self, rows: int, cols: int):
+        super().__init__(rows, cols)
+
+        self.output = []
+
+    def clear_screen(self):
+        self.output.append(f"{ANSI_COLORS[Config.COLOR_BLACK]}{ESCAPE}2J")
+
+    def draw_row(self, y, row):
+        # Runs are sorted and never overlap, so the cursor only has to be
+        # moved across gaps and the color only set when it changes
+        output = [f"{ESCAPE}{y + 1};1H", ANSI_COLORS[Config.COLOR_BLACK], f"{ESCAPE}2K"]
+        cursor = 0
+        current_color = Config.COLOR_BLACK
+
+        for x, text, color in row:
+            if x != cursor:
+                output.append(f"{ESCAPE}{y + 1};{x + 1}H")
+
+            if color != current_color:
+                output.append(ANSI_COLORS.get(color, ""))
+                current_color = color
+
+            output.append(text)
+            cursor = x + len(text)
+
+        self.output.append("".join(output))
+
+    def keyframe(self) -> bytes:
+        # Full repaint of the last presented frame, for clients that join late
+        # or fell behind, without disturbing the row diffing of this renderer
+        self.clear_screen()
+
+        for y, row in self.previous_rows.items():
+            if 0 <= y < self.screen_rows:
+                self.draw_row(y, compose_row(row, self.screen_cols))
+
+        return self.refresh()
+
+    def refresh(self) -> bytes:
+        data = "".join(self.output).encode()
+        self.output = []
+
+        return data
@@ -1,5 +1,7 @@
 import math
 
+from tetris.profiler import profiler
+
 
 class GameGUI:
     def __init__(
@@ -18,7 +20,17 @@ class GameGUI:
         self.highest_score_text = highest_score_text
         self.reset_text = reset_text
 
-    def update(self, dt):
+    def layout_key(self):
+        return (
+            self.grid.x,
+            self.grid.y,
+            self.next_piece.width() if self.next_piece is not None else 0,
+            self.next_piece.height() if self.next_piece is not None else 0,
+            self.score_text.width(),
+            self.highest_score_text.width(),
+        )
+
+    def arrange(self, screen_rows, screen_cols):
         if self.next_piece is not None:
             self.next_piece.x = self.grid.x - 2 * self.next_piece.width() - 2
             self.next_piece.y = (
@@ -43,8 +55,10 @@ class GameGUI:
         )
         self.reset_text.y = self.grid.y + self.grid.height() + 4
 
+    def update(self, dt):
         self.reset_text.update(dt)
 
+    @profiler.phase("gui.draw")
     def draw(self, screen):
         self.grid.draw(screen)
         self.score_text.draw(screen)
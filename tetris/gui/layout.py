@@ -0,0 +1,44 @@
+from typing import Callable, Hashable
+
+Arrange = Callable[[int, int], None]
+
+
+class Layout:
+    # Widgets are positioned by arrange callbacks that only run when the
+    # terminal is resized or when the key of the callback changes, e.g. the
+    # size of a widget or the position of the widget it is placed next to.
+    # Checking the keys is a few attribute reads per frame instead of
+    # recomputing every position.
+    arrangements: list[tuple[Arrange, Callable[[], Hashable]]]
+    keys: list[Hashable]
+
+    def __init__(self, rows: int, cols: int):
+        self.screen_rows = rows
+        self.screen_cols = cols
+        self.arrangements = []
+        self.keys = []
+        self.needs_layout = True
+
+    def add(self, arrange: Arrange, key: Callable[[], Hashable] = lambda: None):
+        self.arrangements.append((arrange, key))
+        self.keys.append(None)
+        self.needs_layout = True
+
+    def resize(self, rows: int, cols: int):
+        if (rows, cols) != (self.screen_rows, self.screen_cols):
+            self.screen_rows = rows
+            self.screen_cols = cols
+            self.needs_layout = True
+
+    def update(self):
+        # Arrangements run in the order they were added, so a widget placed
+        # relative to another one sees its new position on the same frame
+        for index, (arrange, key) in enumerate(self.arrangements):
+            value = key()
+
+            if self.needs_layout or value != self.keys[index]:
+                arrange(self.screen_rows, self.screen_cols)
+                # An arrangement can move what later keys depend on
+                self.keys[index] = key()
+
+        self.needs_layout = False
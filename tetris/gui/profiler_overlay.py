@@ -0,0 +1,40 @@
+from tetris.config import Config
+from tetris.profiler import Profiler
+from tetris.utils import draw_character
+
+
+class ProfilerOverlay:
+    x: int
+    y: int
+    visible: bool
+
+    def __init__(self, profiler: Profiler, visible=False):
+        self.profiler = profiler
+        self.x = 0
+        self.y = 0
+        self.visible = visible
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def draw(self, screen):
+        if not self.visible:
+            return
+
+        draw_character(
+            screen,
+            self.y,
+            self.x,
+            f"{'PHASE':<18}{'P50':>8}{'P95':>8}{'P99':>8}",
+            Config.COLOR_GREEN,
+        )
+
+        for row, (name, stats) in enumerate(sorted(self.profiler.summary().items())):
+            draw_character(
+                screen,
+                self.y + row + 1,
+                self.x,
+                f"{name:<18}{stats['p50_ms']:>8.3f}{stats['p95_ms']:>8.3f}"
+                f"{stats['p99_ms']:>8.3f}",
+                Config.COLOR_GREEN,
+            )
@@ -0,0 +1,155 @@
+import curses
+
+
+def compose_row(
+    row: list[tuple[int, str, int]], width: int
+) -> list[tuple[int, str, int]]:
+    # Flattens the texts drawn on a row, later ones covering earlier ones,
+    # into runs sorted by x that do not overlap and fit in the screen.
+    # Touching runs of the same color are merged so that each one is
+    # written with a single call.
+    runs = []
+
+    for x, text, color in row:
+        if x < 0:
+            text = text[-x:]
+            x = 0
+
+        text = text[: max(width - x, 0)]
+
+        if not text:
+            continue
+
+        end = x + len(text)
+        uncovered = []
+
+        for run_x, run_text, run_color in runs:
+            run_end = run_x + len(run_text)
+
+            if run_end <= x or run_x >= end:
+                uncovered.append((run_x, run_text, run_color))
+                continue
+
+            if run_x < x:
+                uncovered.append((run_x, run_text[: x - run_x], run_color))
+
+            if run_end > end:
+                uncovered.append((end, run_text[end - run_x :], run_color))
+
+        uncovered.append((x, text, color))
+        runs = uncovered
+
+    merged = []
+
+    for x, text, color in sorted(runs):
+        if merged:
+            last_x, last_text, last_color = merged[-1]
+
+            if last_color == color and last_x + len(last_text) == x:
+                merged[-1] = (last_x, last_text + text, color)
+                continue
+
+        merged.append((x, text, color))
+
+    return merged
+
+
+class FrameBuffer:
+    # Collects the texts drawn during a frame row by row so that only the
+    # terminal rows whose contents changed since the previous frame are
+    # written out again.
+    rows: dict[int, list[tuple[int, str, int]]]
+    previous_rows: dict[int, list[tuple[int, str, int]]]
+    needs_full_repaint: bool
+    screen_rows: int
+    screen_cols: int
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = {}
+        self.previous_rows = {}
+        self.needs_full_repaint = True
+        self.screen_rows = rows
+        self.screen_cols = cols
+
+    def size(self) -> tuple[int, int]:
+        return self.screen_rows, self.screen_cols
+
+    def resize(self, rows: int, cols: int):
+        self.screen_rows = rows
+        self.screen_cols = cols
+        self.invalidate()
+
+    def invalidate(self):
+        self.needs_full_repaint = True
+
+    def begin_frame(self):
+        self.rows = {}
+
+    def draw_text(self, y, x, text, color):
+        row = self.rows.get(y)
+
+        if row is None:
+            self.rows[y] = [(x, text, color)]
+        else:
+            row.append((x, text, color))
+
+    def dirty_rows(self):
+        if self.needs_full_repaint:
+            return list(self.rows)
+
+        return [
+            y
+            for y in self.rows.keys() | self.previous_rows.keys()
+            if self.rows.get(y) != self.previous_rows.get(y)
+        ]
+
+    def present(self):
+        dirty_rows = self.dirty_rows()
+
+        if self.needs_full_repaint:
+            self.clear_screen()
+            self.needs_full_repaint = False
+
+        for y in dirty_rows:
+            if 0 <= y < self.screen_rows:
+                self.draw_row(y, compose_row(self.rows.get(y, ()), self.screen_cols))
+
+        self.previous_rows = self.rows
+
+        return self.refresh()
+
+    def clear_screen(self):
+        pass
+
+    def draw_row(self, y, row):
+        pass
+
+    def refresh(self):
+        pass
+
+
+class Renderer(FrameBuffer):
+    def __init__(self, stdscr):
+        super().__init__(*stdscr.getmaxyx())
+
+        self.stdscr = stdscr
+
+    def clear_screen(self):
+        self.stdscr.erase()
+
+    def draw_row(self, y, row):
+        try:
+            self.stdscr.move(y, 0)
+            self.stdscr.clrtoeol()
+        except curses.error:
+            return
+
+        for x, text, color in row:
+            try:
+                self.stdscr.addstr(y, x, text, curses.color_pair(color))
+            except curses.error:
+                pass
+
+    def refresh(self):
+        self.stdscr.noutrefresh()
+        curses.doupdate()
@@ -0,0 +1,74 @@
+import curses
+import selectors
+import sys
+from collections import deque
+
+
+class KeyQueue:
+    keys: deque[int]
+
+    def __init__(self):
+        self.keys = deque()
+
+    def push(self, keys):
+        self.keys.extend(keys)
+
+    def consume(self, key) -> bool:
+        if key not in self.keys:
+            return False
+
+        self.keys.remove(key)
+
+        return True
+
+    def pop_keys(self) -> list[int]:
+        # A tick applies every action once, so only the first press of each
+        # key is popped and repeated presses stay queued for the next ticks
+        keys = []
+        remaining = deque()
+
+        for key in self.keys:
+            (remaining if key in keys else keys).append(key)
+
+        self.keys = remaining
+
+        return keys
+
+
+class InputQueue(KeyQueue):
+    def __init__(self, stdscr, fd=None):
+        super().__init__()
+
+        self.stdscr = stdscr
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(
+            sys.stdin.fileno() if fd is None else fd, selectors.EVENT_READ
+        )
+
+    def wait(self, timeout):
+        if self.drain():
+            return True
+
+        if not self.selector.select(max(timeout, 0)):
+            return False
+
+        return self.drain()
+
+    def drain(self):
+        count = len(self.keys)
+
+        while True:
+            try:
+                key = self.stdscr.getch()
+            except curses.error:
+                break
+
+            if key == -1:
+                break
+
+            self.keys.append(key)
+
+        return len(self.keys) > count
+
+    def close(self):
+        self.selector.close()
@@ -0,0 +1,85 @@
+import json
+import time
+from collections import deque
+from functools import wraps
+
+from tetris.config import Config
+
+
+class PhaseTimings:
+    samples: deque[float]
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, duration: float):
+        self.samples.append(duration)
+        self.count += 1
+
+    def percentiles(self, *percents: float) -> list[float]:
+        samples = sorted(self.samples)
+
+        if not samples:
+            return [0.0 for _ in percents]
+
+        return [
+            samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+            for percent in percents
+        ]
+
+
+class Profiler:
+    phases: dict[str, PhaseTimings]
+
+    def __init__(self, window: int = Config.PROFILER_WINDOW):
+        self.window = window
+        self.enabled = False
+        self.phases = {}
+
+    def record(self, name: str, duration: float):
+        timings = self.phases.get(name)
+
+        if timings is None:
+            timings = self.phases[name] = PhaseTimings(self.window)
+
+        timings.add(duration)
+
+    def phase(self, name: str):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                start = time.perf_counter()
+
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        summary = {}
+
+        for name, timings in self.phases.items():
+            p50, p95, p99 = timings.percentiles(50, 95, 99)
+            summary[name] = {
+                "count": timings.count,
+                "p50_ms": p50 * 1000,
+                "p95_ms": p95 * 1000,
+                "p99_ms": p99 * 1000,
+            }
+
+        return summary
+
+    def dump(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.summary(), file, indent=2, sort_keys=True)
+
+
+profiler = Profiler()
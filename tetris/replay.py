@@ -0,0 +1,295 @@
+import argparse
+import struct
+import sys
+from typing import BinaryIO, Callable, Iterable, Optional
+
+from tetris.actions import Action
+from tetris.simulation import Simulation
+
+MAGIC = b"TRPL"
+VERSION = 1
+HEADER = struct.Struct("<4sBQHHH")
+END_OF_INPUTS = 0
+
+
+def encode_varint(value: int) -> bytes:
+    data = bytearray()
+
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+
+        if value:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+
+def read_varint(stream: BinaryIO) -> int:
+    value = 0
+    shift = 0
+
+    while True:
+        data = stream.read(1)
+
+        if not data:
+            raise ValueError("Truncated replay")
+
+        value |= (data[0] & 0x7F) << shift
+        shift += 7
+
+        if not data[0] & 0x80:
+            return value
+
+
+class ReplayResult:
+    def __init__(self, score: int, lines_cleared: int, ticks: int):
+        self.score = score
+        self.lines_cleared = lines_cleared
+        self.ticks = ticks
+
+    def __eq__(self, other):
+        return isinstance(other, ReplayResult) and (
+            self.score,
+            self.lines_cleared,
+            self.ticks,
+        ) == (other.score, other.lines_cleared, other.ticks)
+
+    def __repr__(self):
+        return (
+            f"ReplayResult(score={self.score}, lines_cleared={self.lines_cleared}, "
+            f"ticks={self.ticks})"
+        )
+
+    @classmethod
+    def from_simulation(cls, simulation: Simulation) -> "ReplayResult":
+        return cls(
+            simulation.game_controller.score,
+            simulation.game_controller.lines_cleared,
+            simulation.ticks,
+        )
+
+
+class Replay:
+    # Binary layout: a fixed header, then one (varint tick delta, action code)
+    # pair per input, an END_OF_INPUTS code and the final score, lines and
+    # ticks as varints.
+    inputs: list[tuple[int, Action]]
+    result: Optional[ReplayResult]
+
+    def __init__(
+        self,
+        seed: int,
+        rows: int,
+        cols: int,
+        tick_rate: int,
+        inputs: Optional[list[tuple[int, Action]]] = None,
+        result: Optional[ReplayResult] = None,
+    ):
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.tick_rate = tick_rate
+        self.inputs = inputs if inputs is not None else []
+        self.result = result
+
+    def actions_by_tick(self) -> dict[int, list[Action]]:
+        actions = {}
+
+        for tick, action in self.inputs:
+            actions.setdefault(tick, []).append(action)
+
+        return actions
+
+    def encode(self) -> bytes:
+        data = bytearray(
+            HEADER.pack(MAGIC, VERSION, self.seed, self.rows, self.cols, self.tick_rate)
+        )
+        last_tick = 0
+
+        for tick, action in self.inputs:
+            data += encode_varint(tick - last_tick)
+            data.append(action.value)
+            last_tick = tick
+
+        data += encode_varint(0)
+        data.append(END_OF_INPUTS)
+
+        result = self.result or ReplayResult(0, 0, 0)
+        data += encode_varint(result.score)
+        data += encode_varint(result.lines_cleared)
+        data += encode_varint(result.ticks)
+
+        return bytes(data)
+
+    @classmethod
+    def decode(cls, stream: BinaryIO) -> Optional["Replay"]:
+        header = stream.read(HEADER.size)
+
+        if not header:
+            return None
+
+        if len(header) != HEADER.size:
+            raise ValueError("Truncated replay header")
+
+        magic, version, seed, rows, cols, tick_rate = HEADER.unpack(header)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a replay file")
+
+        replay = cls(seed, rows, cols, tick_rate)
+        tick = 0
+
+        while True:
+            tick += read_varint(stream)
+            code = stream.read(1)
+
+            if not code:
+                raise ValueError("Truncated replay")
+
+            if code[0] == END_OF_INPUTS:
+                break
+
+            replay.inputs.append((tick, Action(code[0])))
+
+        replay.result = ReplayResult(
+            read_varint(stream), read_varint(stream), read_varint(stream)
+        )
+
+        return replay
+
+
+def read_replays(path: str) -> list[Replay]:
+    replays = []
+
+    with open(path, "rb") as file:
+        while (replay := Replay.decode(file)) is not None:
+            replays.append(replay)
+
+    return replays
+
+
+def append_replay(path: str, replay: Replay):
+    with open(path, "ab") as file:
+        file.write(replay.encode())
+
+
+class ReplayRecorder:
+    replay: Optional[Replay]
+
+    def __init__(
+        self,
+        on_finish: Optional[Callable[[Replay], None]] = None,
+        defer_finish: bool = False,
+    ):
+        self.on_finish = on_finish
+        # A game that can be rewound is only handed to on_finish by flush(),
+        # once it can no longer come back to life
+        self.defer_finish = defer_finish
+        self.replay = None
+
+    def start(self, simulation: Simulation):
+        self.replay = Replay(
+            simulation.seed,
+            simulation.grid.rows,
+            simulation.grid.cols,
+            simulation.tick_rate,
+        )
+
+        # Fail when the game starts rather than when it ends and is encoded
+        try:
+            self.replay.encode()
+        except struct.error as error:
+            raise ValueError(f"Cannot record this game: {error}") from error
+
+    def record(self, tick: int, actions: Iterable[Action]):
+        for action in actions:
+            self.replay.inputs.append((tick, action))
+
+    def rewind(self, tick: int):
+        if self.replay is None:
+            return
+
+        self.replay.inputs = [
+            (input_tick, action)
+            for input_tick, action in self.replay.inputs
+            if input_tick < tick
+        ]
+        self.replay.result = None
+
+    def finish(self, simulation: Simulation):
+        self.replay.result = ReplayResult.from_simulation(simulation)
+
+        if not self.defer_finish:
+            self.flush()
+
+    def flush(self):
+        if self.replay is None or self.replay.result is None:
+            return
+
+        if self.on_finish is not None:
+            self.on_finish(self.replay)
+
+        self.replay = None
+
+
+class ReplayPlayer:
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.actions = replay.actions_by_tick()
+
+    def policy(self, simulation: Simulation) -> list[Action]:
+        return self.actions.get(simulation.ticks, [])
+
+    def create_simulation(self) -> Simulation:
+        simulation = Simulation(
+            self.replay.rows, self.replay.cols, tick_rate=self.replay.tick_rate
+        )
+        simulation.reset(self.replay.seed)
+
+        return simulation
+
+    def play(self, realtime: bool = False) -> Simulation:
+        simulation = self.create_simulation()
+        max_ticks = self.replay.result.ticks if self.replay.result else None
+        simulation.run(self.policy, max_ticks=max_ticks, realtime=realtime)
+
+        return simulation
+
+    def verify(self) -> bool:
+        return ReplayResult.from_simulation(self.play()) == self.replay.result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m tetris.replay",
+        description="Replay recorded games headless and check their results",
+    )
+    parser.add_argument("files", nargs="+", metavar="FILE")
+    parser.add_argument(
+        "--realtime", action="store_true", help="pace replays at their tick rate"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    mismatches = 0
+
+    for path in args.files:
+        for index, replay in enumerate(read_replays(path)):
+            result = ReplayResult.from_simulation(
+                ReplayPlayer(replay).play(realtime=args.realtime)
+            )
+            status = "ok" if result == replay.result else "MISMATCH"
+            mismatches += status != "ok"
+            print(f"{path}[{index}] seed={replay.seed} {result} {status}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
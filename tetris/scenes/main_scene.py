@@ -1,23 +1,25 @@
 from __future__ import annotations
 from enum import Enum, auto
-import math
 import time
 
+from tetris.actions import actions_from_keys
 from tetris.config import Config
-from tetris.entities.grid import Grid
+from tetris.entities.ghost_piece import GhostPiece
 from tetris.entities.pieces import PieceFactory, PieceType
-from tetris.entities.game_controller import GameController
 from tetris.entities.score_text import ScoreText
 from tetris.entities.reset_text import ResetText
 from tetris.entities.text import Text
 from tetris.gui.game_gui import GameGUI
+from tetris.gui.layout import Layout
 from tetris.events import (
-    Event,
     PieceAddedEvent,
     LinesClearedEvent,
     GameOverEvent,
 )
+from tetris.replay import ReplayPlayer
 from tetris.scenes.scene import Scene
+from tetris.scores import ScoreRecord
+from tetris.simulation import History, Simulation
 from tetris.utils import calculate_score
 
 
@@ -27,19 +29,58 @@ class GameStatus(Enum):
 
 
 class MainScene(Scene):
-    def __init__(self, stdscr):
-        super().__init__(stdscr)
+    def __init__(
+        self,
+        stdscr,
+        input_queue,
+        tick_rate=Config.TICK_RATE,
+        seed=None,
+        recorder=None,
+        replay=None,
+        player=None,
+        score_store=None,
+        rows=Config.ROWS,
+        cols=Config.COLS,
+        practice=False,
+    ):
+        super().__init__(stdscr, input_queue)
+
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.recorder = recorder
+        self.replay_player = ReplayPlayer(replay) if replay is not None else None
+        self.player = player
+        self.score_store = score_store
+        self.rows = rows
+        self.cols = cols
+        self.practice = practice and replay is None
+
+        if replay is not None:
+            self.rows = replay.rows
+            self.cols = replay.cols
 
     def init(self):
         self.piece_factory = PieceFactory()
+        self.simulation = Simulation(
+            self.rows, self.cols, tick_rate=self.tick_rate, recorder=self.recorder
+        )
 
-        self.grid = Grid(Config.ROWS, Config.COLS, x=0, y=0)
-        self.piece = self.piece_factory.create_piece(PieceType.I)
+        self.grid = self.simulation.grid
+        self.piece = self.simulation.piece
         self.next_piece = self.piece_factory.create_piece(PieceType.I)
 
-        self.game_controller = GameController(self.grid, self.piece, self.stdscr)
-        self.game_controller.add_observer(lambda event: self.on_event(event))
-        self.game_controller.start()
+        self.game_controller = self.simulation.game_controller
+        self.event_bus = self.game_controller.event_bus
+        self.subscriptions = [
+            self.event_bus.subscribe(
+                PieceAddedEvent, self.on_piece_added, queued=True, coalesce=True
+            ),
+            self.event_bus.subscribe(GameOverEvent, self.on_game_over),
+            self.event_bus.subscribe(LinesClearedEvent, self.on_lines_cleared),
+        ]
+        self.history = History(Config.REWIND_HISTORY_SECONDS * self.tick_rate)
+        self.reset_simulation()
+        self.event_bus.flush()
 
         self.score = ScoreText("SCORE: ")
         self.highest_score_text = ScoreText("HIGHEST SCORE: ", max_score_length=8)
@@ -54,42 +95,166 @@ class MainScene(Scene):
             self.reset_text,
         )
 
+        self.ghost_piece = GhostPiece(self.grid, self.piece)
         self.status = GameStatus.RUNNING
 
-    def draw(self):
-        self.game_gui.draw(self.stdscr)
-        self.piece.draw(self.stdscr)
+        if self.score_store is not None:
+            best = self.score_store.top(1)
+            self.highest_score_text.score = best[0].score if best else 0
+
+        self.tick_keys = None
+        self.is_scrolling = False
+        self.layout = Layout(*self.stdscr.getmaxyx())
+        self.layout.add(self.centralize_grid, self.grid_layout_key)
+        self.layout.add(self.game_gui.arrange, self.game_gui.layout_key)
+        self.layout.update()
+
+    def draw(self, screen):
+        self.game_gui.draw(screen)
+
+        if self.status == GameStatus.RUNNING:
+            self.ghost_piece.draw(screen)
+
+        self.piece.draw(screen)
+
+    def handle_input(self):
+        # Called as soon as keys arrive between ticks. The keys become the
+        # next tick's keys and their moves are applied now, while gravity
+        # and locking still wait for the tick.
+        if (
+            self.tick_keys is not None
+            or self.replay_player is not None
+            or self.status != GameStatus.RUNNING
+            or (self.practice and ord(Config.REWIND_KEY) in self.input_queue.keys)
+        ):
+            return
+
+        self.tick_keys = self.input_queue.pop_keys()
+        self.save_history()
+        self.simulation.apply_moves(actions_from_keys(self.tick_keys))
+        self.layout.update()
 
     def update(self, dt):
+        moves_applied = self.tick_keys is not None
+        keys = self.tick_keys if moves_applied else self.input_queue.pop_keys()
+        self.tick_keys = None
+
         self.game_gui.update(dt)
-        self.game_controller.update(dt)
+
+        if self.replay_player is not None:
+            self.simulation.step(self.replay_player.policy(self.simulation))
+        elif self.practice and ord(Config.REWIND_KEY) in keys:
+            self.rewind(Config.REWIND_STEP_SECONDS * self.tick_rate)
+        else:
+            if not moves_applied:
+                self.save_history()
+
+            self.simulation.step(actions_from_keys(keys), moves_applied=moves_applied)
 
         if self.status == GameStatus.GAME_OVER:
-            if self.stdscr.getch() == ord(" "):
+            if ord(" ") in keys:
                 self.status = GameStatus.RUNNING
-                self.game_controller.start()
+                self.reset_simulation()
                 self.game_over.visible = False
                 self.reset_text.visible = False
 
-    def on_event(self, event: Event):
-        if isinstance(event, PieceAddedEvent):
-            self.next_piece.matrix = self.piece_factory.create_piece(
-                event.piece_type,
-                rotation=2 if event.piece_type == PieceType.I else 0,
-            ).matrix
-
-            self.next_piece.x = self.grid.x - 2 * self.next_piece.width() - 2
-            self.next_piece.y = (
-                self.grid.y
-                + self.grid.height() // 2
-                - math.ceil(self.next_piece.height() / 2)
+        self.event_bus.flush()
+        self.layout.update()
+
+    def resize(self, rows, cols):
+        self.layout.resize(rows, cols)
+        self.layout.update()
+
+    def save_history(self):
+        if self.practice and self.simulation.is_running:
+            self.history.push(self.simulation.snapshot())
+
+    def rewind(self, ticks):
+        snapshot = self.history.rewind(ticks)
+
+        if snapshot is None:
+            return
+
+        self.simulation.restore(snapshot)
+        self.score.score = self.game_controller.score
+        self.show_next_piece(self.game_controller.next_piece_type)
+
+        if self.simulation.is_running:
+            self.status = GameStatus.RUNNING
+            self.game_over.visible = False
+            self.reset_text.visible = False
+
+    def reset_simulation(self):
+        self.history.clear()
+
+        if self.recorder is not None:
+            self.recorder.flush()
+
+        if self.replay_player is not None:
+            self.simulation.reset(self.replay_player.replay.seed)
+        else:
+            self.simulation.reset(self.seed)
+            self.seed = None
+
+    def grid_layout_key(self):
+        # The grid only moves with the piece while the well is scrolling
+        if not self.is_scrolling:
+            return None
+
+        return self.piece.x - self.grid.x, self.piece.y - self.grid.y
+
+    def centralize_grid(self, win_rows, win_cols):
+        x = (win_cols - 2 * self.grid.cols - 2) // 2
+        y = (win_rows - self.grid.rows - 2) // 2
+        self.is_scrolling = x < 0 or y < 0
+
+        # A well larger than the terminal scrolls to follow the falling piece
+        if x < 0:
+            piece_x = self.piece.x - self.grid.x
+            x = min(0, max(win_cols - 2 * self.grid.cols - 4, win_cols // 2 - piece_x))
+
+        if y < 0:
+            piece_y = self.piece.y - self.grid.y
+            y = min(0, max(win_rows - self.grid.rows - 2, win_rows // 3 - piece_y))
+
+        self.game_controller.move_grid(x, y)
+
+    def exit(self):
+        for subscription in self.subscriptions:
+            subscription.cancel()
+
+        if self.recorder is not None:
+            self.recorder.flush()
+
+    def on_piece_added(self, event: PieceAddedEvent):
+        self.show_next_piece(event.piece_type)
+
+    def show_next_piece(self, piece_type: PieceType):
+        self.next_piece.copy_shape(
+            self.piece_factory.create_piece(
+                piece_type, rotation=2 if piece_type == PieceType.I else 0
             )
-        elif isinstance(event, GameOverEvent):
-            self.status = GameStatus.GAME_OVER
-            self.game_over.visible = True
-            self.reset_text.visible = True
-
-            if self.score.score > self.highest_score_text.score:
-                self.highest_score_text.score = self.score.score
-        elif isinstance(event, LinesClearedEvent):
-            self.score.score += calculate_score(event.number_of_lines)
+        )
+
+    def on_game_over(self, event: GameOverEvent):
+        self.status = GameStatus.GAME_OVER
+        self.game_over.visible = True
+        self.reset_text.visible = True
+
+        if self.score.score > self.highest_score_text.score:
+            self.highest_score_text.score = self.score.score
+
+        # Practice games can be rewound, so they stay off the leaderboard
+        if (
+            self.score_store is not None
+            and self.replay_player is None
+            and not self.practice
+        ):
+            self.score_store.add(
+                ScoreRecord(
+                    self.player, self.score.score, self.game_controller.lines_cleared
+                )
+            )
+
+    def on_lines_cleared(self, event: LinesClearedEvent):
+        self.score.score += calculate_score(event.number_of_lines)
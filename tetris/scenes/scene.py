@@ -1,12 +1,22 @@
 class Scene:
-    def __init__(self, stdscr):
+    def __init__(self, stdscr, input_queue):
         self.stdscr = stdscr
+        self.input_queue = input_queue
 
     def init(self):
         pass
 
+    def handle_input(self):
+        pass
+
     def update(self, dt):
         pass
 
-    def draw(self):
+    def draw(self, screen):
+        pass
+
+    def resize(self, rows, cols):
+        pass
+
+    def exit(self):
         pass
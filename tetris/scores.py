@@ -0,0 +1,331 @@
+import argparse
+import bisect
+import fcntl
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Optional
+
+from tetris.config import Config
+
+CHECKSUM = struct.Struct("<I")
+RECORD_HEADER = struct.Struct("<HQId")
+
+
+class ScoreRecord:
+    def __init__(
+        self,
+        player: str,
+        score: int,
+        lines_cleared: int = 0,
+        timestamp: Optional[float] = None,
+    ):
+        self.player = player
+        self.score = score
+        self.lines_cleared = lines_cleared
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __repr__(self):
+        return (
+            f"ScoreRecord(player={self.player!r}, score={self.score}, "
+            f"lines_cleared={self.lines_cleared})"
+        )
+
+    def sort_key(self):
+        # Highest score first, earliest game first among equal scores
+        return (-self.score, self.timestamp)
+
+    def to_json(self) -> list:
+        return [self.player, self.score, self.lines_cleared, self.timestamp]
+
+    @classmethod
+    def from_json(cls, data: list) -> "ScoreRecord":
+        return cls(*data)
+
+    def encode(self) -> bytes:
+        name = self.player.encode()
+        body = (
+            RECORD_HEADER.pack(
+                len(name), self.score, self.lines_cleared, self.timestamp
+            )
+            + name
+        )
+
+        return CHECKSUM.pack(zlib.crc32(body)) + body
+
+    @classmethod
+    def decode(cls, data: bytes, offset: int) -> Optional[tuple["ScoreRecord", int]]:
+        # Returns the record and the offset after it, or None for a record that
+        # was cut short or corrupted by a crash while it was being appended
+        start = offset + CHECKSUM.size
+        end = start + RECORD_HEADER.size
+
+        if end > len(data):
+            return None
+
+        (crc,) = CHECKSUM.unpack_from(data, offset)
+        name_length, score, lines_cleared, timestamp = RECORD_HEADER.unpack_from(
+            data, start
+        )
+        end += name_length
+
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            return None
+
+        player = data[end - name_length : end].decode()
+
+        return cls(player, score, lines_cleared, timestamp), end
+
+
+def find_record(data: bytes, offset: int) -> Optional[int]:
+    # Offset of the first record at or after `offset` whose checksum matches
+    last = len(data) - CHECKSUM.size - RECORD_HEADER.size
+
+    for candidate in range(offset, last + 1):
+        if ScoreRecord.decode(data, candidate) is not None:
+            return candidate
+
+    return None
+
+
+class ScoreIndex:
+    # Top scores and the best game of every player, as of the first
+    # `log_size` bytes of the record log.
+    top: list[ScoreRecord]
+    best: dict[str, ScoreRecord]
+
+    def __init__(self, capacity=Config.SCORE_INDEX_SIZE):
+        self.capacity = capacity
+        self.log_size = 0
+        self.top = []
+        self.best = {}
+
+    def add(self, record: ScoreRecord):
+        best = self.best.get(record.player)
+
+        if best is None or record.sort_key() < best.sort_key():
+            self.best[record.player] = record
+
+        keys = [entry.sort_key() for entry in self.top]
+        position = bisect.bisect_right(keys, record.sort_key())
+
+        if position < self.capacity:
+            self.top.insert(position, record)
+            del self.top[self.capacity :]
+
+    def to_json(self) -> dict:
+        return {
+            "log_size": self.log_size,
+            "top": [record.to_json() for record in self.top],
+            "best": [record.to_json() for record in self.best.values()],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict, capacity=Config.SCORE_INDEX_SIZE) -> "ScoreIndex":
+        index = cls(capacity)
+        index.log_size = data["log_size"]
+        index.top = [ScoreRecord.from_json(record) for record in data["top"]]
+        del index.top[capacity:]
+        index.best = {
+            record.player: record
+            for record in map(ScoreRecord.from_json, data["best"])
+        }
+
+        return index
+
+
+class ScoreStore:
+    # Games are appended to a log of checksummed records, which is the source
+    # of truth. The index file is a snapshot of the queries over a prefix of
+    # the log, so opening the store only reads the records appended since.
+    # Writers hold an exclusive lock on a side file, readers a shared one.
+    index: ScoreIndex
+    skipped_ranges: list[tuple[int, int]]
+
+    def __init__(self, path: str, capacity=Config.SCORE_INDEX_SIZE):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        self.capacity = capacity
+        self.index = self.load_index()
+        # (start, end) offsets of the corrupted bytes catch_up skipped
+        self.skipped_ranges = []
+
+    def load_index(self) -> ScoreIndex:
+        try:
+            with open(self.index_path) as file:
+                return ScoreIndex.from_json(json.load(file), self.capacity)
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return ScoreIndex(self.capacity)
+
+    @contextmanager
+    def locked(self, exclusive: bool):
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def catch_up(self, repair: bool = False) -> bool:
+        # Indexes the records other processes appended since the last call.
+        # Returns whether anything was added.
+        try:
+            with open(self.path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+
+                if size < self.index.log_size:
+                    # The log was replaced or truncated behind our back
+                    self.index = ScoreIndex(self.capacity)
+
+                file.seek(self.index.log_size)
+                data = file.read()
+        except FileNotFoundError:
+            self.index = ScoreIndex(self.capacity)
+            return False
+
+        offset = 0
+        start = self.index.log_size
+
+        while offset < len(data):
+            decoded = ScoreRecord.decode(data, offset)
+
+            if decoded is not None:
+                record, offset = decoded
+                self.index.add(record)
+                continue
+
+            next_offset = find_record(data, offset + 1)
+
+            if next_offset is None:
+                # Nothing valid follows, so this is a record that was torn by
+                # a crash while it was being appended
+                break
+
+            # A corrupted record in the middle of the log is skipped, the
+            # records after it are still valid
+            self.skipped_ranges.append((start + offset, start + next_offset))
+            offset = next_offset
+
+        self.index.log_size = start + offset
+
+        if repair and offset < len(data):
+            # Drop a torn record so that new records are appended after the
+            # last complete one
+            with open(self.path, "r+b") as file:
+                file.truncate(self.index.log_size)
+                os.fsync(file.fileno())
+
+        return offset > 0
+
+    def add(self, record: ScoreRecord):
+        with self.locked(exclusive=True):
+            self.catch_up(repair=True)
+
+            with open(self.path, "ab") as file:
+                file.write(record.encode())
+                file.flush()
+                os.fsync(file.fileno())
+                self.index.log_size = file.tell()
+
+            self.index.add(record)
+            self.save_index()
+
+    def save_index(self):
+        temporary_path = f"{self.index_path}.{os.getpid()}.tmp"
+
+        with open(temporary_path, "w") as file:
+            json.dump(self.index.to_json(), file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self.index_path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def refresh(self):
+        with self.locked(exclusive=False):
+            self.catch_up()
+
+    def top(self, count: int = 10) -> list[ScoreRecord]:
+        # Only the best `capacity` games are indexed
+        if count > self.capacity:
+            raise ValueError(f"Only the top {self.capacity} scores are kept")
+
+        self.refresh()
+
+        return self.index.top[:count]
+
+    def best(self, player: str) -> Optional[ScoreRecord]:
+        self.refresh()
+
+        return self.index.best.get(player)
+
+    def rebuild_index(self):
+        with self.locked(exclusive=True):
+            self.index = ScoreIndex(self.capacity)
+            self.catch_up(repair=True)
+            self.save_index()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m tetris.scores", description="Show the leaderboard"
+    )
+    parser.add_argument("file", metavar="FILE")
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help=f"number of scores to show, at most {Config.SCORE_INDEX_SIZE}",
+    )
+    parser.add_argument("--player", help="show the best game of this player")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="rebuild the index from the log"
+    )
+
+    args = parser.parse_args()
+
+    if args.top > Config.SCORE_INDEX_SIZE:
+        parser.error(f"--top: only the top {Config.SCORE_INDEX_SIZE} scores are kept")
+
+    return args
+
+
+def main():
+    args = parse_args()
+    store = ScoreStore(args.file)
+
+    if args.rebuild:
+        store.rebuild_index()
+
+    if args.player is not None:
+        records = [record for record in [store.best(args.player)] if record]
+    else:
+        records = store.top(args.top)
+
+    for position, record in enumerate(records, start=1):
+        played_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.timestamp))
+        print(
+            f"{position:>3}. {record.player:<16} {record.score:>8} "
+            f"{record.lines_cleared:>5} lines  {played_at}"
+        )
+
+    for start, end in store.skipped_ranges:
+        print(
+            f"warning: skipped {end - start} corrupted bytes at offset {start}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
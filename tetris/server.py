@@ -0,0 +1,416 @@
+import argparse
+import asyncio
+import itertools
+import time
+
+from tetris.broadcast import END_OF_STREAM, Broadcaster
+from tetris.config import Config
+from tetris.gui.ansi_renderer import ESCAPE, AnsiRenderer
+from tetris.input import KeyQueue
+from tetris.scenes.main_scene import MainScene
+from tetris.utils import board_size
+
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+ECHO = 1
+SUPPRESS_GO_AHEAD = 3
+NAWS = 31
+
+CTRL_C = 3
+CTRL_D = 4
+BACKSPACE = 8
+DELETE = 127
+QUIT_KEY = ord("q")
+
+TELNET_HANDSHAKE = bytes(
+    [IAC, WILL, ECHO, IAC, WILL, SUPPRESS_GO_AHEAD, IAC, DO, NAWS]
+)
+CLEAR_SCREEN = f"{ESCAPE}2J{ESCAPE}H"
+HIDE_CURSOR = f"{ESCAPE}?25l".encode()
+SHOW_CURSOR = f"{ESCAPE}?25h{ESCAPE}0m{ESCAPE}2J{ESCAPE}H".encode()
+
+DEFAULT_SCREEN_SIZE = (24, 80)
+
+
+class TelnetDecoder:
+    # Splits the client stream into key codes, dropping telnet negotiation and
+    # picking up the window size whenever the client reports it with NAWS.
+    def __init__(self, on_resize=None):
+        self.state = "data"
+        self.subnegotiation = bytearray()
+        self.window_size = None
+        self.on_resize = on_resize
+
+    def feed(self, data: bytes) -> list[int]:
+        keys = []
+
+        for byte in data:
+            if self.state == "data":
+                if byte == IAC:
+                    self.state = "iac"
+                elif byte not in (0, ord("\n")):
+                    keys.append(byte)
+            elif self.state == "iac":
+                if byte == IAC:
+                    keys.append(byte)
+                    self.state = "data"
+                elif byte in (DO, DONT, WILL, WONT):
+                    self.state = "option"
+                elif byte == SB:
+                    self.subnegotiation.clear()
+                    self.state = "sb"
+                else:
+                    self.state = "data"
+            elif self.state == "option":
+                self.state = "data"
+            elif self.state == "sb":
+                if byte == IAC:
+                    self.state = "sb_iac"
+                else:
+                    self.subnegotiation.append(byte)
+            elif self.state == "sb_iac":
+                if byte == SE:
+                    self.end_subnegotiation()
+                    self.state = "data"
+                else:
+                    self.subnegotiation.append(byte)
+                    self.state = "sb"
+
+        return keys
+
+    def end_subnegotiation(self):
+        data = self.subnegotiation
+
+        if len(data) == 5 and data[0] == NAWS:
+            cols = data[1] << 8 | data[2]
+            rows = data[3] << 8 | data[4]
+
+            if rows and cols and (rows, cols) != self.window_size:
+                self.window_size = (rows, cols)
+
+                if self.on_resize is not None:
+                    self.on_resize(rows, cols)
+
+
+class SessionTerminal:
+    # Stands in for the curses window the scenes query for the screen size.
+    def __init__(self, decoder: TelnetDecoder):
+        self.decoder = decoder
+
+    def getmaxyx(self):
+        return self.decoder.window_size or DEFAULT_SCREEN_SIZE
+
+
+class TelnetSession:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.decoder = TelnetDecoder()
+        self.terminal = SessionTerminal(self.decoder)
+        self.closed = False
+
+    async def read_keys(self) -> list[int]:
+        # Returns an empty list once the client disconnected or asked to quit
+        while True:
+            try:
+                data = await self.reader.read(1024)
+            except ConnectionError:
+                data = b""
+
+            if not data:
+                return []
+
+            keys = self.decoder.feed(data)
+
+            if CTRL_C in keys or CTRL_D in keys:
+                return []
+
+            if keys:
+                return keys
+
+    async def close(self):
+        self.closed = True
+
+        try:
+            self.writer.write(SHOW_CURSOR)
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+        self.writer.close()
+
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class GameSession(TelnetSession):
+    def __init__(
+        self,
+        session_id,
+        reader,
+        writer,
+        tick_rate=Config.TICK_RATE,
+        rows=Config.ROWS,
+        cols=Config.COLS,
+    ):
+        super().__init__(reader, writer)
+
+        self.session_id = session_id
+        self.tick_rate = tick_rate
+        self.input = KeyQueue()
+        self.renderer = AnsiRenderer(*self.terminal.getmaxyx())
+        self.broadcaster = Broadcaster()
+        self.scene = MainScene(
+            self.terminal, self.input, tick_rate=tick_rate, rows=rows, cols=cols
+        )
+        self.decoder.on_resize = self.resize
+
+    async def run(self):
+        self.writer.write(TELNET_HANDSHAKE + HIDE_CURSOR)
+        self.scene.init()
+        reader_task = asyncio.create_task(self.read_input())
+
+        try:
+            await self.tick()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            reader_task.cancel()
+            self.scene.exit()
+            self.broadcaster.close()
+            await self.close()
+
+    async def read_input(self):
+        while not self.closed:
+            keys = await self.read_keys()
+
+            if not keys or QUIT_KEY in keys:
+                break
+
+            self.input.push(keys)
+
+        self.closed = True
+
+    async def tick(self):
+        # Each session sleeps until its own next tick, so hundreds of them
+        # interleave on the event loop without a thread or process apiece.
+        dt = 1 / self.tick_rate
+        next_update = time.perf_counter()
+
+        while not self.closed:
+            updates = 0
+
+            while (
+                time.perf_counter() >= next_update
+                and updates < Config.MAX_UPDATES_PER_FRAME
+            ):
+                self.scene.update(dt)
+                next_update += dt
+                updates += 1
+
+            if updates == Config.MAX_UPDATES_PER_FRAME:
+                next_update = time.perf_counter() + dt
+
+            self.draw()
+            await self.writer.drain()
+            await asyncio.sleep(max(next_update - time.perf_counter(), 0))
+
+    def resize(self, rows, cols):
+        self.renderer.resize(rows, cols)
+        self.scene.resize(rows, cols)
+
+    def draw(self):
+        self.renderer.begin_frame()
+        self.scene.draw(self.renderer)
+        data = self.renderer.present()
+
+        if data:
+            self.writer.write(data)
+
+        self.broadcaster.publish(data, self.renderer.keyframe)
+
+    def score(self) -> int:
+        return self.scene.score.score
+
+
+class SpectatorSession(TelnetSession):
+    def __init__(self, reader, writer, sessions: dict[int, GameSession]):
+        super().__init__(reader, writer)
+
+        self.sessions = sessions
+
+    async def run(self):
+        self.writer.write(TELNET_HANDSHAKE)
+
+        try:
+            session = await self.choose_session()
+
+            if session is not None:
+                await self.watch(session)
+        except ConnectionError:
+            pass
+        finally:
+            await self.close()
+
+    async def choose_session(self):
+        if not self.sessions:
+            self.writer.write(b"No games are being played right now\r\n")
+            return None
+
+        lines = [f"{CLEAR_SCREEN}Games being played:"]
+        lines += [
+            f"  {session_id:>4}  score {session.score()}"
+            for session_id, session in self.sessions.items()
+        ]
+        lines.append("Game to watch (Enter for the latest): ")
+        self.writer.write("\r\n".join(lines).encode())
+        text = bytearray()
+
+        while True:
+            keys = await self.read_keys()
+
+            if not keys or QUIT_KEY in keys:
+                return None
+
+            for key in keys:
+                if key == ord("\r"):
+                    session_id = int(text) if text else max(self.sessions, default=0)
+
+                    return self.sessions.get(session_id)
+
+                if key in (BACKSPACE, DELETE) and text:
+                    text.pop()
+                    self.writer.write(b"\b \b")
+                elif chr(key).isdigit():
+                    text.append(key)
+                    self.writer.write(bytes([key]))
+
+    async def watch(self, session: GameSession):
+        viewer = session.broadcaster.subscribe()
+        reader_task = asyncio.create_task(self.read_until_quit(viewer))
+        self.writer.write(HIDE_CURSOR)
+
+        try:
+            while (frame := await viewer.frames.get()) is not END_OF_STREAM:
+                self.writer.write(frame)
+                await self.writer.drain()
+        finally:
+            reader_task.cancel()
+            session.broadcaster.unsubscribe(viewer)
+
+    async def read_until_quit(self, viewer):
+        while True:
+            keys = await self.read_keys()
+
+            if not keys or QUIT_KEY in keys:
+                viewer.close()
+                return
+
+
+class GameServer:
+    sessions: dict[int, GameSession]
+
+    def __init__(
+        self,
+        tick_rate=Config.TICK_RATE,
+        max_sessions=None,
+        rows=Config.ROWS,
+        cols=Config.COLS,
+    ):
+        self.tick_rate = tick_rate
+        self.max_sessions = max_sessions
+        self.rows = rows
+        self.cols = cols
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+
+    async def handle_connection(self, reader, writer):
+        if self.max_sessions is not None and len(self.sessions) >= self.max_sessions:
+            writer.write(b"Server is full, try again later\r\n")
+            await writer.drain()
+            writer.close()
+            return
+
+        session = GameSession(
+            next(self.session_ids),
+            reader,
+            writer,
+            tick_rate=self.tick_rate,
+            rows=self.rows,
+            cols=self.cols,
+        )
+        self.sessions[session.session_id] = session
+
+        try:
+            await session.run()
+        finally:
+            del self.sessions[session.session_id]
+
+    async def handle_spectator(self, reader, writer):
+        await SpectatorSession(reader, writer, self.sessions).run()
+
+    async def serve(self, host, port, spectator_port=None):
+        servers = [await asyncio.start_server(self.handle_connection, host, port)]
+
+        if spectator_port is not None:
+            servers.append(
+                await asyncio.start_server(self.handle_spectator, host, spectator_port)
+            )
+
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="tetris-server",
+        description="Host independent games for telnet clients",
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument(
+        "--fps",
+        type=int,
+        default=Config.TICK_RATE,
+        help="simulation and frame rate of every session",
+    )
+    parser.add_argument("--rows", type=board_size, default=Config.ROWS)
+    parser.add_argument("--cols", type=board_size, default=Config.COLS)
+    parser.add_argument(
+        "--spectator-port",
+        type=int,
+        default=2324,
+        help="port where viewers pick a game to watch, 0 to disable",
+    )
+    parser.add_argument(
+        "--max-sessions", type=int, help="refuse connections above this many games"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = GameServer(
+        tick_rate=args.fps,
+        max_sessions=args.max_sessions,
+        rows=args.rows,
+        cols=args.cols,
+    )
+
+    try:
+        asyncio.run(
+            server.serve(args.host, args.port, args.spectator_port or None)
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import random
+import time
+from collections import deque
+from typing import Callable, Iterable, Optional
+
+from tetris.actions import Action
+from tetris.config import Config
+from tetris.entities.bitboard_grid import BitboardGrid
+from tetris.entities.game_controller import GameController
+from tetris.entities.pieces import PieceFactory, PieceType
+from tetris.events import Event, GameOverEvent
+
+SEED_BITS = Config.SEED_BITS
+
+
+def random_seed() -> int:
+    return random.SystemRandom().getrandbits(SEED_BITS)
+
+
+class Snapshot:
+    # The state of a Simulation between two ticks. Grid rows are shared with
+    # the grid and with other snapshots, so taking one every tick is cheap.
+    __slots__ = ("ticks", "seed", "state")
+
+    def __init__(self, ticks: int, seed: int, state: tuple):
+        self.ticks = ticks
+        self.seed = seed
+        self.state = state
+
+
+class History:
+    # The last `capacity` snapshots, oldest first
+    snapshots: deque[Snapshot]
+
+    def __init__(self, capacity: int):
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def push(self, snapshot: Snapshot):
+        self.snapshots.append(snapshot)
+
+    def rewind(self, count: int) -> Optional[Snapshot]:
+        # Drops the last `count` snapshots and returns the oldest of them, or
+        # the oldest one left when the history is shorter than that
+        snapshot = None
+
+        while self.snapshots and count > 0:
+            snapshot = self.snapshots.pop()
+            count -= 1
+
+        return snapshot
+
+    def clear(self):
+        self.snapshots.clear()
+
+
+class Simulation:
+    ticks: int
+    seed: int
+
+    def __init__(
+        self,
+        rows=Config.ROWS,
+        cols=Config.COLS,
+        tick_rate=Config.TICK_RATE,
+        recorder=None,
+    ):
+        self.tick_rate = tick_rate
+        self.tick = 1 / tick_rate
+        self.ticks = 0
+        self.seed = 0
+        self.recorder = recorder
+        self.rng = random.Random()
+        self.piece_factory = PieceFactory()
+
+        self.grid = BitboardGrid(rows, cols, x=0, y=0)
+        self.piece = self.piece_factory.create_piece(PieceType.I)
+        self.game_controller = GameController(self.grid, self.piece, self.rng)
+
+    @property
+    def is_running(self) -> bool:
+        return self.game_controller.is_running
+
+    def reset(self, seed: Optional[int] = None) -> list[Event]:
+        self.ticks = 0
+        self.seed = random_seed() if seed is None else seed
+        self.rng.seed(self.seed)
+
+        if self.recorder is not None:
+            self.recorder.start(self)
+
+        return self.game_controller.start()
+
+    def apply_moves(self, actions: Iterable[Action]):
+        # Moves the piece for the next tick's actions before the tick is due,
+        # so input shows up without waiting for it. That step has to be passed
+        # the same actions with moves_applied set, which records them and
+        # applies the rest, so replays see one batch of actions per tick.
+        if self.is_running:
+            self.game_controller.handle_moves(actions)
+
+    def step(
+        self,
+        actions: Iterable[Action] = (),
+        dt: Optional[float] = None,
+        moves_applied: bool = False,
+    ) -> list[Event]:
+        if self.recorder is not None and self.is_running:
+            self.recorder.record(self.ticks, actions)
+
+        self.ticks += 1
+        events = self.game_controller.update(
+            self.tick if dt is None else dt, actions, moves_applied
+        )
+
+        if self.recorder is not None:
+            if any(isinstance(event, GameOverEvent) for event in events):
+                self.recorder.finish(self)
+
+        return events
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(self.ticks, self.seed, self.game_controller.snapshot())
+
+    def restore(self, snapshot: Snapshot):
+        self.ticks = snapshot.ticks
+        self.seed = snapshot.seed
+        self.game_controller.restore(snapshot.state)
+
+        if self.recorder is not None:
+            # Inputs after the snapshot never happened, the replay of the game
+            # only keeps the ones that lead to the restored state
+            self.recorder.rewind(self.ticks)
+
+    def run(
+        self,
+        policy: Callable[["Simulation"], Iterable[Action]],
+        max_ticks: Optional[int] = None,
+        realtime: bool = False,
+        on_events: Optional[Callable[[list[Event]], None]] = None,
+    ) -> int:
+        deadline = time.perf_counter()
+
+        while self.is_running and (max_ticks is None or self.ticks < max_ticks):
+            events = self.step(policy(self))
+
+            if on_events is not None and events:
+                on_events(events)
+
+            if realtime:
+                deadline += self.tick
+                delay = deadline - time.perf_counter()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+        return self.ticks
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tetris.ai.bot import Bot
+from tetris.config import Config
+from tetris.simulation import Simulation
+from tetris.utils import board_size, game_seed
+
+STRATEGIES = {
+    "bot": lambda: Bot(lookahead=False),
+    "bot-lookahead": lambda: Bot(lookahead=True),
+    "idle": lambda: (lambda simulation: ()),
+}
+
+
+class GameJob:
+    def __init__(self, game_id, seed, strategy, max_ticks, rows, cols):
+        self.game_id = game_id
+        self.seed = seed
+        self.strategy = strategy
+        self.max_ticks = max_ticks
+        self.rows = rows
+        self.cols = cols
+
+
+def play_game(job: GameJob) -> dict:
+    start = time.perf_counter()
+    simulation = Simulation(job.rows, job.cols)
+    simulation.reset(job.seed)
+    policy = STRATEGIES[job.strategy]()
+    simulation.run(policy, max_ticks=job.max_ticks)
+    controller = simulation.game_controller
+    result = {
+        "game_id": job.game_id,
+        "seed": job.seed,
+        "strategy": job.strategy,
+        "score": controller.score,
+        "lines_cleared": controller.lines_cleared,
+        "level": controller.level,
+        "pieces_placed": controller.pieces_placed,
+        "ticks": simulation.ticks,
+        "game_over": not controller.is_running,
+        "seconds": time.perf_counter() - start,
+    }
+
+    if isinstance(policy, Bot) and policy.search is not None:
+        result["cache"] = policy.search.cache_stats()
+
+    return result
+
+
+def play_chunk(jobs: list[GameJob]) -> list[dict]:
+    return [play_game(job) for job in jobs]
+
+
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def chunked(items, size):
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def write_results(results, output) -> int:
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+
+    output.flush()
+
+    return len(results)
+
+
+def run_tournament(jobs, output, workers=None, chunk_size=4, max_pending=None):
+    # Chunks are submitted lazily so that cancelling only has to drop the
+    # chunks that are already queued, and results are written as soon as
+    # their chunk completes.
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    chunks = chunked(jobs, chunk_size)
+    pending = set()
+    completed = 0
+
+    with ProcessPoolExecutor(workers, initializer=ignore_interrupts) as executor:
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    chunk = next(chunks, None)
+
+                    if chunk is None:
+                        break
+
+                    pending.add(executor.submit(play_chunk, chunk))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    completed += write_results(future.result(), output)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+
+            for future in pending:
+                if not future.cancelled():
+                    completed += write_results(future.result(), output)
+
+            print(
+                f"Cancelled after {completed} of {len(jobs)} games",
+                file=sys.stderr,
+            )
+
+    return completed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="tetris-tournament",
+        description="Play many headless games in parallel and stream the results",
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        choices=sorted(STRATEGIES),
+        help="strategy to play, repeat to alternate between several",
+    )
+    parser.add_argument(
+        "--seed", type=game_seed, default=0, help="seed of the first game"
+    )
+    parser.add_argument("--workers", type=int, help="defaults to the number of CPUs")
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument(
+        "--max-ticks",
+        type=int,
+        default=10 * 60 * Config.TICK_RATE,
+        help="stop games that are still running after this many ticks",
+    )
+    parser.add_argument("--rows", type=board_size, default=Config.ROWS)
+    parser.add_argument("--cols", type=board_size, default=Config.COLS)
+    parser.add_argument(
+        "--output", metavar="FILE", help="append JSON lines here instead of stdout"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    strategies = args.strategy or ["bot"]
+    jobs = [
+        GameJob(
+            game_id,
+            args.seed + game_id,
+            strategies[game_id % len(strategies)],
+            args.max_ticks,
+            args.rows,
+            args.cols,
+        )
+        for game_id in range(args.games)
+    ]
+
+    if args.output is None:
+        run_tournament(jobs, sys.stdout, args.workers, args.chunk_size)
+    else:
+        with open(args.output, "a") as output:
+            run_tournament(jobs, output, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-import curses
+import argparse
+
+from tetris.config import Config
 
 
 def calculate_score(number_of_lines: int):
@@ -15,7 +17,41 @@ def calculate_score(number_of_lines: int):
 
 
 def draw_character(screen, y, x, character, color):
-    try:
-        screen.addstr(y, x, character, curses.color_pair(color))
-    except curses.error:
-        pass
+    screen.draw_text(y, x, character, color)
+
+
+def draw_clipped(screen, y, x, text, color):
+    # Cuts off the parts of the text left and right of the screen
+    if x < 0:
+        text = text[-x:]
+        x = 0
+
+    text = text[: max(screen.size()[1] - x, 0)]
+
+    if text:
+        screen.draw_text(y, x, text, color)
+
+
+def board_size(value):
+    # Replays store the board size in 16 bits
+    size = int(value)
+
+    if not Config.MIN_BOARD_SIZE <= size <= Config.MAX_BOARD_SIZE:
+        raise argparse.ArgumentTypeError(
+            f"must be between {Config.MIN_BOARD_SIZE} and {Config.MAX_BOARD_SIZE}, "
+            f"got {size}"
+        )
+
+    return size
+
+
+def game_seed(value):
+    # Replays store the seed as an unsigned 64 bit integer
+    seed = int(value)
+
+    if not 0 <= seed < 2**Config.SEED_BITS:
+        raise argparse.ArgumentTypeError(
+            f"must be between 0 and 2**{Config.SEED_BITS} - 1, got {seed}"
+        )
+
+    return seed